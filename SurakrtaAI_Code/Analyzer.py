@@ -1,9 +1,15 @@
-from Board import Surakarta
+from Board import Board, Surakarta
 import numpy as np
 from tqdm import tqdm
 from Enums import Tile
 from Heuristics import basic_heuristic, smart_heuristic, switch_color
 from Player import MiniMaxPlayer, MonteCarloPlayer, RandomPlayer
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import inspect
+import json
+import os
+import pickle
+import random
 import time
 import pandas as pd
 from pandas import ExcelWriter
@@ -37,21 +43,21 @@ class Analyzer:
         """
         run a simulation and store the results
         """
-        game = Surakarta(self.black_player, self.red_player)
-        while not game.is_endgame():
-            current_color = game.get_current_player().get_color()
-            current_time1 = time.time()
-            game.move()
-            current_time2 = time.time()
-            if current_color == Tile.RED:
-                self.red_time.append(current_time2 - current_time1)
-            else:
-                self.black_time.append(current_time2 - current_time1)
-        board = game.get_board()
+        self.record_game(*play_game(self.black_player, self.red_player))
+
+    def record_game(self, red_tiles, black_tiles, red_time, black_time):
+        """
+        :param red_tiles: the number of red tiles left at the end of the game
+        :param black_tiles: the number of black tiles left at the end of the game
+        :param red_time: a list of the times of the red moves
+        :param black_time: a list of the times of the black moves
+        stores the results of a game played by the players
+        """
         i = self.game_iteration
-        self.red_surviving_tiles[i] = board.get_num_pieces(Tile.RED)
-        # print(board.print_board())
-        self.black_surviving_tiles[i] = board.get_num_pieces(Tile.BLACK)
+        self.red_surviving_tiles[i] = red_tiles
+        self.black_surviving_tiles[i] = black_tiles
+        self.red_time.extend(red_time)
+        self.black_time.extend(black_time)
         self.game_iteration += 1
 
     def simulate(self):
@@ -89,6 +95,196 @@ class Analyzer:
         return (12 - np.mean(self.red_surviving_tiles)) / 12
 
 
+def play_game(black_player, red_player, board_type=Board):
+    """
+    :param black_player: the black player
+    :param red_player: the red player
+    :param board_type: the board class to play on (Board or BitBoard.BitBoard)
+    :return: a tuple (red tiles, black tiles, red move times, black move
+             times) of a game between the players
+    """
+    game = Surakarta(black_player, red_player, board_type=board_type)
+    red_time, black_time = [], []
+    while not game.is_endgame():
+        current_color = game.get_current_player().get_color()
+        current_time1 = time.time()
+        game.move()
+        current_time2 = time.time()
+        if current_color == Tile.RED:
+            red_time.append(current_time2 - current_time1)
+        else:
+            black_time.append(current_time2 - current_time1)
+    board = game.get_board()
+    return board.get_num_pieces(Tile.RED), board.get_num_pieces(Tile.BLACK), \
+        red_time, black_time
+
+
+# the pickled players of the running tournament, every game unpickles fresh
+# copies so its result does not depend on the games before it in the process
+_TOURNAMENT_PLAYERS = []
+# the board class the games of the running tournament are played on
+_TOURNAMENT_BOARD_TYPE = [Board]
+
+
+def init_tournament(players, board_type=Board):
+    """
+    runs once in every process of the tournament
+    :param players: the list of the players of the tournament
+    :param board_type: the board class to play the games on
+    """
+    _TOURNAMENT_PLAYERS[:] = [pickle.dumps(player) for player in players]
+    _TOURNAMENT_BOARD_TYPE[:] = [board_type]
+
+
+def get_jobs(num_players, num_games, seed=0):
+    """
+    :param num_players: the number of players
+    :param num_games: the number of games of every pair, half of them with
+                      each player as black
+    :param seed: the seed of the tournament, None to not seed the games
+    :return: a list of the jobs (i, j, swap, index, seed) of the tournament,
+             a game of players i < j where j is black iff swap, with its own
+             seed derived from the tournament seed
+    """
+    return [get_job(i, j, swap, index, seed)
+            for i in range(num_players) for j in range(i + 1, num_players)
+            for swap in (0, 1) for index in range(num_games // 2)]
+
+
+def get_job(i, j, swap, index, seed=0):
+    """
+    :param i: the index of the first player
+    :param j: the index of the second player, i < j
+    :param swap: 1 iff j is black
+    :param index: the index of the game among the games of the pair and colors
+    :param seed: the seed of the tournament, None to not seed the game
+    :return: the job of the game, with its seed derived from the tournament seed
+    """
+    return i, j, swap, index, None if seed is None else hash((seed, i, j, swap, index)) % 2 ** 32
+
+
+def run_job(job):
+    """
+    :param job: a job from get_jobs
+    :return: a tuple (job, results of play_game)
+    """
+    i, j, swap, index, seed = job
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    black, red = (j, i) if swap else (i, j)
+    black_player, red_player = [pickle.loads(_TOURNAMENT_PLAYERS[k])
+                                for k in (black, red)]
+    return job, play_game(black_player, red_player, _TOURNAMENT_BOARD_TYPE[0])
+
+
+def run_tournament(players, jobs, workers=0, board_type=Board):
+    """
+    :param players: the list of the players
+    :param jobs: the jobs to run, from get_jobs
+    :param workers: the number of worker processes, 0 to play in this process
+    :param board_type: the board class to play the games on
+    :return: a generator of the tuples (job, results of play_game), in the
+             order the games finish
+    """
+    if not workers:
+        init_tournament(players, board_type)
+        for job in tqdm(jobs):
+            yield run_job(job)
+        return
+    with ProcessPoolExecutor(workers, initializer=init_tournament,
+                             initargs=(players, board_type)) as pool:
+        futures = [pool.submit(run_job, job) for job in jobs]
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            yield future.result()
+
+
+def get_player_name(player) -> str:
+    """
+    :param player: a player
+    :return: a short description of the player and its settings, the
+             arguments of its constructor without a default come first and
+             then every other argument that is not its default as name=value.
+             the constructor arguments are read back from the attributes of
+             the same names
+    """
+    settings = []
+    for name, parameter in inspect.signature(type(player).__init__).parameters.items():
+        if name == 'self' or not hasattr(player, name):
+            continue
+        value = getattr(player, name)
+        text = getattr(value, '__name__', None) or str(value)
+        if parameter.default is inspect.Parameter.empty:
+            settings.append(text)
+        elif value != parameter.default:
+            settings.append(f'{name}={text}')
+    return f'{type(player).__name__}({", ".join(settings)})'
+
+
+def get_record(players, job, result) -> dict:
+    """
+    :param players: the list of the players
+    :param job: a job from get_jobs
+    :param result: the results of play_game of the job
+    :return: the log record of the game, a json serializable dictionary
+    """
+    i, j, swap, index, seed = job
+    black, red = (j, i) if swap else (i, j)
+    red_tiles, black_tiles, red_time, black_time = result
+    return {'job': [i, j, swap, index],
+            'seed': seed,
+            'black': black,
+            'red': red,
+            'black player': get_player_name(players[black]),
+            'red player': get_player_name(players[red]),
+            'black tiles': int(black_tiles),
+            'red tiles': int(red_tiles),
+            'black time': list(black_time),
+            'red time': list(red_time),
+            'plies': len(black_time) + len(red_time)}
+
+
+def read_log(log_file, players, seed=0) -> dict:
+    """
+    :param log_file: the path of a jsonl game log, may not exist yet
+    :param players: the list of the players of the tournament
+    :param seed: the seed of the tournament
+    :return: a dictionary (i, j, swap, index) --> the record of the game, of
+             every complete line of the log. a line cut by a crash is skipped
+    """
+    records = {}
+    if log_file is None or not os.path.exists(log_file):
+        return records
+    with open(log_file) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            key = tuple(record['job'])
+            if key[1] >= len(players):
+                continue
+            if record['seed'] != get_job(*key, seed)[4] or \
+                    record['black player'] != get_player_name(players[record['black']]) or \
+                    record['red player'] != get_player_name(players[record['red']]):
+                raise ValueError(f'the game {key} of {log_file} is of another tournament')
+            records[key] = record
+    return records
+
+
+def open_log(log_file):
+    """
+    :param log_file: the path of a jsonl game log
+    :return: the log opened for appending, after a line cut by a crash
+    """
+    log = open(log_file, 'a+')
+    if log.tell():
+        log.seek(log.tell() - 1)
+        if log.read(1) != '\n':
+            log.write('\n')
+    return log
+
+
 HEURISTICS = [basic_heuristic, smart_heuristic]
 PLAYERS = [MiniMaxPlayer(depth, heuristic)
            for depth in range(1, 6) for heuristic in HEURISTICS]
@@ -122,33 +318,233 @@ def get_statistics(analyzer1, analyzer2, color, i, j):
                          'player': i})
 
 
-def simulations(players, file_name='', num_games=10):
+def get_summary(players, records):
     """
-    :param players: gets a list of players to test
-    :param file_name: the name of the file to save the simulations into
-    :param num_games: gets the number of games to test on
-    saves the statistics to an excel file to later use
+    :param players: the list of the players
+    :param records: a dictionary (i, j, swap, index) --> the record of a game,
+                    with games of both colors for every pair
+    :return: the statistics of every pair of players, as get_statistics
     """
     arr = []
     for i in range(len(players)):
         for j in range(i + 1, len(players)):
             player1, player2 = players[i], players[j]
+            games = [sorted(index for (i2, j2, swap2, index) in records
+                            if (i2, j2, swap2) == (i, j, swap)) for swap in (0, 1)]
 
-            analyzer1 = Analyzer(player1, player2, number_of_games=num_games // 2)
-            analyzer1.simulate()
-
-            analyzer2 = Analyzer(player2, player1, number_of_games=num_games // 2)
-            analyzer2.simulate()
+            analyzer1 = Analyzer(player1, player2, number_of_games=len(games[0]))
+            analyzer2 = Analyzer(player2, player1, number_of_games=len(games[1]))
+            for analyzer, swap in ((analyzer1, 0), (analyzer2, 1)):
+                for index in games[swap]:
+                    record = records[(i, j, swap, index)]
+                    analyzer.record_game(record['red tiles'], record['black tiles'],
+                                         record['red time'], record['black time'])
 
             arr.append(get_statistics(analyzer1, analyzer2, Tile.BLACK, i, j))
-            print(arr[-1])
             arr.append(get_statistics(analyzer1, analyzer2, Tile.RED, j, i))
-            print(arr[-1])
-    df = pd.concat(arr)
+    return pd.concat(arr)
+
+
+def get_score(record, player) -> float:
+    """
+    :param record: the record of a game
+    :param player: the index of a player of the game
+    :return: the score of the player in the game, 1 for a win, 0.5 for a tie
+             and 0 for a loss. the player with more tiles left wins
+    """
+    own, enemy = ('black', 'red') if record['black'] == player else ('red', 'black')
+    return (np.sign(record[f'{own} tiles'] - record[f'{enemy} tiles']) + 1) / 2
+
+
+def get_expected_score(elo) -> float:
+    """
+    :param elo: an elo difference
+    :return: the expected score of the stronger side of the difference
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def get_ratings(players, records, confidence=1.96):
+    """
+    :param players: the list of the players
+    :param records: a dictionary (i, j, swap, index) --> the record of a game
+    :param confidence: the number of standard errors of the intervals
+    :return: a data frame of the maximum likelihood elo of every player, the
+             average is 0. every player also gets a virtual tie with a 0
+             player, so a player that won or lost all its games still gets a
+             finite elo
+    """
+    n = len(players)
+    # one row per game and virtual tie: (player, enemy or n for the virtual
+    # player, the score of player)
+    games = [(record['black'], record['red'], get_score(record, record['black']))
+             for record in records.values()] + [(k, n, 0.5) for k in range(n)]
+    first, second, scores = (np.array(column) for column in zip(*games))
+    ratings = np.zeros(n + 1)
+    for _ in range(100):
+        expected = 1 / (1 + np.exp(ratings[second] - ratings[first]))
+        gradient = np.zeros(n + 1)
+        np.add.at(gradient, first, scores - expected)
+        np.add.at(gradient, second, expected - scores)
+        weights = expected * (1 - expected)
+        hessian = np.zeros((n + 1, n + 1))
+        np.add.at(hessian, (first, first), weights)
+        np.add.at(hessian, (second, second), weights)
+        np.add.at(hessian, (first, second), -weights)
+        np.add.at(hessian, (second, first), -weights)
+        # the virtual player stays at 0
+        step = np.linalg.solve(hessian[:n, :n], gradient[:n])
+        ratings[:n] += step
+        if np.abs(step).max() < 1e-9:
+            break
+    errors = np.sqrt(np.diag(np.linalg.inv(hessian[:n, :n])))
+    scale = 400 / np.log(10)
+    elo = (ratings[:n] - ratings[:n].mean()) * scale
+    counts = np.bincount(np.concatenate((first, second)), minlength=n + 1)[:n] - 1
+    totals = np.zeros(n + 1)
+    np.add.at(totals, first, scores)
+    np.add.at(totals, second, 1 - scores)
+    return pd.DataFrame({'player': range(n),
+                         'name': [get_player_name(player) for player in players],
+                         'games': counts,
+                         '% score': (totals[:n] - 0.5) / np.maximum(counts, 1),
+                         'elo': elo,
+                         'elo low': elo - confidence * errors * scale,
+                         'elo high': elo + confidence * errors * scale})
+
+
+def get_llr(scores, elo0, elo1) -> float:
+    """
+    :param scores: the scores of a player in its games against an enemy
+    :param elo0: the elo difference of the null hypothesis
+    :param elo1: the elo difference of the alternative hypothesis
+    :return: the approximate log likelihood ratio of elo1 over elo0 given the
+             scores. the variance gets half a win and half a loss more, so a
+             pair that always ends the same is not decided after one game
+    """
+    n = len(scores)
+    if not n:
+        return 0.0
+    score0, score1 = get_expected_score(elo0), get_expected_score(elo1)
+    mean = np.mean(scores)
+    prior_mean = (np.sum(scores) + 0.5) / (n + 1)
+    variance = (np.sum(np.square(scores)) + 0.5) / (n + 1) - prior_mean ** 2
+    return n * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+
+def get_sprt_bounds(alpha, beta):
+    """
+    :param alpha: the probability to accept elo1 when elo0 is true
+    :param beta: the probability to accept elo0 when elo1 is true
+    :return: a tuple (lower, upper) of the bounds of the log likelihood ratio
+    """
+    return np.log(beta / (1 - alpha)), np.log((1 - beta) / alpha)
+
+
+def get_pair_scores(records, i, j):
+    """
+    :param records: a dictionary (i, j, swap, index) --> the record of a game
+    :param i: the index of the first player
+    :param j: the index of the second player, i < j
+    :return: a list of the scores of i in its games against j
+    """
+    return [get_score(record, i) for key, record in records.items() if key[:2] == (i, j)]
+
+
+def run_sprt(players, records, budget, sprt, workers=0, seed=0, log=None,
+             board_type=Board):
+    """
+    plays the pairs in rounds of one game per color, a pair stops once its
+    sequential probability ratio test accepts a hypothesis. the games the
+    decided pairs do not play go to the undecided pairs with the closest
+    ratios, until the budget is spent
+    :param players: the list of the players
+    :param records: a dictionary (i, j, swap, index) --> the record of a game,
+                    the new games are added to it
+    :param budget: the total number of games
+    :param sprt: a tuple (elo0, elo1, alpha, beta) of the test of every pair,
+                 the elo is of the first player of the pair
+    :param workers: the number of processes to play the games in
+    :param seed: the seed of the tournament
+    :param log: an open log to append the finished games to, or None
+    :param board_type: the board class to play the games on
+    :return: a dictionary (i, j) --> 'H0', 'H1' or '' if the pair is undecided
+    """
+    elo0, elo1, alpha, beta = sprt
+    lower, upper = get_sprt_bounds(alpha, beta)
+    pairs = [(i, j) for i in range(len(players)) for j in range(i + 1, len(players))]
+    rounds = dict.fromkeys(pairs, 0)
+    while True:
+        llrs = {pair: get_llr(get_pair_scores(records, *pair), elo0, elo1) for pair in pairs}
+        undecided = [pair for pair in pairs if lower < llrs[pair] < upper]
+        remaining = budget - len(records)
+        if not undecided or remaining < 2:
+            break
+        # the closest pairs first, by the distance of the ratio from a bound
+        undecided.sort(key=lambda pair: min(llrs[pair] - lower, upper - llrs[pair]))
+        jobs = []
+        for i, j in undecided[:remaining // 2]:
+            jobs += [get_job(i, j, swap, rounds[(i, j)], seed) for swap in (0, 1)]
+            rounds[(i, j)] += 1
+        for job, result in run_tournament(players, [job for job in jobs if job[:4] not in records],
+                                          workers, board_type):
+            records[job[:4]] = get_record(players, job, result)
+            if log is not None:
+                log.write(json.dumps(records[job[:4]]) + '\n')
+                log.flush()
+    return {pair: 'H1' if llrs[pair] >= upper else 'H0' if llrs[pair] <= lower else ''
+            for pair in pairs}
+
+
+def simulations(players, file_name=None, num_games=10, workers=0, seed=0, log_file=None,
+                sprt=None, board_type=Board):
+    """
+    :param players: gets a list of players to test
+    :param file_name: the name of the excel file to save the statistics into,
+                      None to not write one
+    :param num_games: gets the number of games to test on
+    :param workers: the number of processes to play the games in, 0 to play
+                    them in this process
+    :param seed: the seed of the tournament, every game gets its own seed
+                 from it, None to not seed the games
+    :param log_file: the path of a jsonl log to append every finished game
+                     to. the games already in it are not played again, so a
+                     stopped tournament resumes from its log
+    :param sprt: None to play num_games games of every pair, or a tuple
+                 (elo0, elo1, alpha, beta) to stop every pair once it is
+                 decided and to play the saved games in the close pairs, see
+                 run_sprt
+    :param board_type: the board class to play the games on, BitBoard.BitBoard
+                       plays the same games faster
+    :return: the statistics of every pair of players
+    """
+    records = read_log(log_file, players, seed)
+    log = None if log_file is None else open_log(log_file)
+    try:
+        if sprt is None:
+            jobs = get_jobs(len(players), num_games, seed)
+            records = {job[:4]: records[job[:4]] for job in jobs if job[:4] in records}
+            pending = [job for job in jobs if job[:4] not in records]
+            for job, result in run_tournament(players, pending, workers, board_type):
+                records[job[:4]] = get_record(players, job, result)
+                if log is not None:
+                    log.write(json.dumps(records[job[:4]]) + '\n')
+                    log.flush()
+        else:
+            budget = num_games // 2 * len(players) * (len(players) - 1)
+            print(run_sprt(players, records, budget, sprt, workers, seed, log, board_type))
+    finally:
+        if log is not None:
+            log.close()
+    df = get_summary(players, records)
+    ratings = get_ratings(players, records)
     print(df)
-    writer = ExcelWriter(f'{file_name}.xlsx')
-    df.to_excel(writer, f'Sheet1')
-    writer.save()
+    print(ratings)
+    if file_name is not None:
+        with ExcelWriter(f'{file_name}.xlsx') as writer:
+            df.to_excel(writer, sheet_name='Sheet1')
+            ratings.to_excel(writer, sheet_name='Ratings')
+    return df
 
 # commented because plotnine DOESN'T work on linux!!
 # from plotnine import *
@@ -0,0 +1,169 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from functools import partial
+from Board import Board
+from Heuristics import smart_heuristic
+from Perft import get_position
+from Player import MiniMaxPlayer, MonteCarloPlayer
+
+POSITIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'benchmark_positions.json')
+# the stored results the benchmark compares to by default, rewrite it with a
+# run of the accepted version when a change is meant to alter the search
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'benchmark_baseline.json')
+# minimax searches with iterative deepening under a time limit it never
+# reaches, so every depth up to its depth is searched and timed
+NO_TIME_LIMIT = 10 ** 9
+# name --> a function that builds the player with its fixed settings, the
+# seed makes the monte carlo search repeat itself
+BENCHMARK_PLAYERS = {
+    'minimax': partial(MiniMaxPlayer, 5, smart_heuristic, time_limit=NO_TIME_LIMIT),
+    'mcts': partial(MonteCarloPlayer, 4, 500, smart_heuristic, seed=0),
+}
+# every search runs this many times and the fastest run is kept
+REPEATS = 5
+# the relative change of a metric that counts as a regression
+THRESHOLD = 0.1
+# the metrics of a position that regress when they grow. the time is noisy
+# for a single position, so it is compared by its total over the positions of
+# a player. nodes/sec is not compared since with the same nodes it only
+# repeats the time
+METRICS = ('peak memory',)
+
+
+def load_positions(positions_file=POSITIONS_FILE):
+    """
+    :param positions_file: the path of a json file of the positions
+    :return: a tuple (version, list of (name, moves)) of the positions, the
+             moves are the actions from the starting board as in
+             Perft.PERFT_POSITIONS
+    """
+    with open(positions_file) as file:
+        data = json.load(file)
+    return data['version'], [(position['name'], position['moves'])
+                             for position in data['positions']]
+
+
+def search(player_name, moves, board_class=Board):
+    """
+    :param player_name: a key of BENCHMARK_PLAYERS
+    :param moves: the moves of the position
+    :param board_class: the board class of the backend to search with
+    :return: a tuple (player, action, time) of a new player after choosing
+             an action in the position
+    """
+    board = get_position(board_class, moves)
+    player = BENCHMARK_PLAYERS[player_name]()
+    player.set_color(board.get_color_to_move())
+    start = time.perf_counter()
+    action = player.get_action(board)
+    return player, action, time.perf_counter() - start
+
+
+def get_nodes(player) -> int:
+    """
+    :param player: a player after a search
+    :return: the nodes of a minimax search or the simulations of a monte carlo
+             search
+    """
+    if isinstance(player, MonteCarloPlayer):
+        return player.tree.get_simulations()
+    return player.stats.nodes
+
+
+def benchmark_position(player_name, name, moves, repeats=REPEATS) -> dict:
+    """
+    :param player_name: a key of BENCHMARK_PLAYERS
+    :param name: the name of the position
+    :param moves: the moves of the position
+    :param repeats: the number of timed searches, the fastest is kept
+    :return: the results of the player in the position. the peak memory is
+             measured by another search under tracemalloc, which slows it down
+    """
+    runs = [search(player_name, moves) for _ in range(repeats)]
+    player, action, elapsed = min(runs, key=lambda run: run[2])
+    tracemalloc.start()
+    search(player_name, moves)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = get_nodes(player)
+    stats = getattr(player, 'stats', None)
+    return {'player': player_name,
+            'position': name,
+            'move': None if action is None else f'{action.start_point} {action.end_point}',
+            'nodes': nodes,
+            'nodes/sec': nodes / elapsed if elapsed else 0.,
+            'time': elapsed,
+            'time to depth': None if isinstance(player, MonteCarloPlayer) else stats.iteration_times,
+            'peak memory': peak}
+
+
+def run_benchmark(positions_file=POSITIONS_FILE, players=None, repeats=REPEATS) -> dict:
+    """
+    :param positions_file: the path of a json file of the positions
+    :param players: the keys of BENCHMARK_PLAYERS to run, None for all
+    :param repeats: the number of timed searches of every position
+    :return: the results of every player in every position, with the version
+             of the positions
+    """
+    version, positions = load_positions(positions_file)
+    return {'positions version': version,
+            'results': [benchmark_position(player_name, name, moves, repeats)
+                        for player_name in (players or BENCHMARK_PLAYERS)
+                        for name, moves in positions]}
+
+
+def compare(results, baseline, threshold=THRESHOLD) -> list:
+    """
+    :param results: the results of run_benchmark
+    :param baseline: the stored results of run_benchmark to compare to
+    :param threshold: the relative change of a metric that counts as a
+                      regression
+    :return: a list of the messages of the regressions: a metric or the total
+             time of a player worse than the baseline by more than the
+             threshold, or a different move or number of nodes, which means
+             the search plays differently
+    """
+    if results['positions version'] != baseline['positions version']:
+        return [f'positions version {results["positions version"]} != '
+                f'baseline version {baseline["positions version"]}']
+    old = {(result['player'], result['position']): result for result in baseline['results']}
+    messages, times = [], {}
+    for result in results['results']:
+        key = (result['player'], result['position'])
+        if key not in old:
+            continue
+        total, old_total = times.get(result['player'], (0., 0.))
+        times[result['player']] = total + result['time'], old_total + old[key]['time']
+        for field in ('move', 'nodes'):
+            if result[field] != old[key][field]:
+                messages.append(f'{key}: {field} {old[key][field]} -> {result[field]}')
+        for metric in METRICS:
+            if old[key][metric] and result[metric] / old[key][metric] - 1 > threshold:
+                messages.append(f'{key}: {metric} {old[key][metric]:.4g} -> '
+                                f'{result[metric]:.4g}')
+    for player_name, (total, old_total) in times.items():
+        if old_total and total / old_total - 1 > threshold:
+            messages.append(f'{player_name}: total time {old_total:.4g} -> {total:.4g}')
+    return messages
+
+
+if __name__ == '__main__':
+    # usage: python Benchmark.py results.json [baseline.json [threshold]]
+    benchmark = run_benchmark()
+    for row in benchmark['results']:
+        print(row)
+    with open(sys.argv[1], 'w') as results_file:
+        json.dump(benchmark, results_file, indent=2)
+    baseline_path = sys.argv[2] if len(sys.argv) > 2 else BASELINE_FILE
+    if os.path.exists(baseline_path) and os.path.abspath(baseline_path) != os.path.abspath(sys.argv[1]):
+        with open(baseline_path) as baseline_file:
+            regressions = compare(benchmark, json.load(baseline_file),
+                                  float(sys.argv[3]) if len(sys.argv) > 3 else THRESHOLD)
+        for message in regressions:
+            print('REGRESSION', message)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,310 @@
+import numpy as np
+from functools import lru_cache
+from Board import Action, AttackMap, BaseBoard, HEIGHT, WIDTH, SQUARE_BITS
+from Enums import Tile
+from Circuits import get_circuits
+from Zobrist import get_zobrist_keys
+from PositionTables import get_position_tables, compute_position_scores
+
+
+@lru_cache(maxsize=None)
+def get_tables(height, width):
+    """
+    :param height: the height of the board
+    :param width: the width of the board
+    :return: king_moves where king_moves[square] is a tuple of the
+             (square, (y, x)) neighbours of square, built once per size and
+             shared by all the boards of the size
+    """
+    king_moves = []
+    for square in range(height * width):
+        y, x = divmod(square, width)
+        king_moves.append(tuple((ny * width + nx, (ny, nx))
+                                for nx in range(x - 1, x + 2)
+                                for ny in range(y - 1, y + 2)
+                                if (ny, nx) != (y, x) and
+                                0 <= ny < height and 0 <= nx < width))
+    return tuple(king_moves)
+
+
+class BitBoard(BaseBoard):
+    """
+    a drop-in replacement of Board that stores the position as two integers,
+    bit y * width + x of each one is set iff the color has a tile at (y, x)
+    """
+
+    def __init__(self, height=HEIGHT, width=WIDTH):
+        """
+        creates the board and the tables of the moves for its size
+        :param height: gets the height of the board
+        :param width: gets the width of the board
+        """
+        self.height, self.width = height, width
+        self.king_moves = get_tables(height, width)
+        self.circuits = get_circuits(height, width)
+        rows = height // 2 - 1
+        row_bits = (1 << (rows * width)) - 1
+        self.black_bits = row_bits
+        self.red_bits = row_bits << ((height - rows) * width)
+        self.red_count = bin(self.red_bits).count('1')
+        self.black_count = bin(self.black_bits).count('1')
+        self.last_eat_red = 0
+        self.last_eat_black = 0
+        self.to_move = Tile.RED
+        self.zobrist = get_zobrist_keys(height, width)
+        self.key = self.zobrist.compute_key(self)
+        self._np_board = None
+        self.position_tables = get_position_tables(height, width)
+        # color --> the running scores of its pieces, one per position table
+        self.position_scores = {color: compute_position_scores(self, color)
+                                for color in (Tile.RED, Tile.BLACK)}
+        # (key, color) --> the AttackMap of the color in the position
+        self.attack_maps = {}
+
+    def _get_bits(self, color: Tile) -> int:
+        """
+        :param color: the color of the tiles
+        :return: the bits of the tiles of the given color
+        """
+        if color == Tile.RED:
+            return self.red_bits
+        if color == Tile.BLACK:
+            return self.black_bits
+        return ~(self.red_bits | self.black_bits) & ((1 << (self.height * self.width)) - 1)
+
+    def get_tile(self, y: int, x: int) -> Tile:
+        """
+        :param y: gets the y in the board
+        :param x: gets the x in the board
+        :return: the tile in (y, x)
+        """
+        square = 1 << (y * self.width + x)
+        if self.red_bits & square:
+            return Tile.RED
+        if self.black_bits & square:
+            return Tile.BLACK
+        return Tile.EMPTY
+
+    def _get_king_moves(self, square: int, occupied: int, moves: list):
+        """
+        :param square: the square of the tile we want to move
+        :param occupied: the bits of all the tiles in the board
+        :param moves: the list to append the packed king moves from square to
+        """
+        for next_square, _ in self.king_moves[square]:
+            if not occupied >> next_square & 1:
+                moves.append(square | next_square << SQUARE_BITS)
+
+    def _compute_attack_map(self, player: Tile) -> AttackMap:
+        """
+        :param player: the color of the pieces
+        :return: the attack map of player, scanning all the circuits
+        """
+        attack_map = AttackMap()
+        own = self._get_bits(player)
+        occupied = self.red_bits | self.black_bits
+        for square in self._iter_squares(own):
+            others = occupied & ~(1 << square)
+            for ray in self.circuits.get_rays(*divmod(square, self.width)):
+                for _, next_square, loops in ray:
+                    if others >> next_square & 1:
+                        if loops:
+                            attack_map.add(square, next_square,
+                                           not own >> next_square & 1)
+                        break
+        return attack_map
+
+    def _iter_squares(self, bits: int):
+        """
+        :param bits: a bit set of squares
+        :return: an iterator over the indices of the set bits
+        """
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def get_legal_moves(self, player: Tile, moves=None) -> list:
+        """
+        :param player: the color of the player to check
+        :param moves: a list to reuse for the result, cleared first
+        :return: the packed moves of all the legal actions of the player
+        """
+        if moves is None:
+            moves = []
+        else:
+            moves.clear()
+        occupied = self.red_bits | self.black_bits
+        for square in self._iter_squares(self._get_bits(player)):
+            self._get_king_moves(square, occupied, moves)
+        # the eating moves come from the attack map
+        moves.extend(self.get_attack_map(player).captures)
+        return moves
+
+    def _has_same_tiles(self, other) -> bool:
+        """
+        :param other: a board of the same backend
+        :return: true iff both boards have the same tiles in every square
+        """
+        return self.black_bits == other.black_bits and self.red_bits == other.red_bits
+
+    def __copy__(self):
+        copy_board = BitBoard.__new__(BitBoard)
+        copy_board.height, copy_board.width = self.height, self.width
+        copy_board.king_moves = self.king_moves
+        copy_board.circuits = self.circuits
+        copy_board.black_bits = self.black_bits
+        copy_board.red_bits = self.red_bits
+        copy_board.red_count = self.red_count
+        copy_board.black_count = self.black_count
+        copy_board.last_eat_black = self.last_eat_black
+        copy_board.last_eat_red = self.last_eat_red
+        copy_board.to_move = self.to_move
+        copy_board.zobrist = self.zobrist
+        copy_board.key = self.key
+        copy_board.position_tables = self.position_tables
+        copy_board.position_scores = {color: scores.copy() for color, scores
+                                      in self.position_scores.items()}
+        copy_board.attack_maps = {}
+        copy_board._np_board = None
+        return copy_board
+
+    def is_capture_action(self, action: Action) -> bool:
+        """
+        :param action: gets a legal action
+        :return: true iff the action eats a tile (a loop action)
+        """
+        y, x = action.end_point
+        return bool((self.red_bits | self.black_bits) >> (y * self.width + x) & 1)
+
+    def _set_tile(self, point, tile: Tile):
+        """
+        :param point: a (y, x) point in the board
+        :param tile: the tile to put in point
+        """
+        square = 1 << (point[0] * self.width + point[1])
+        self.red_bits &= ~square
+        self.black_bits &= ~square
+        if tile == Tile.RED:
+            self.red_bits |= square
+        elif tile == Tile.BLACK:
+            self.black_bits |= square
+        self._np_board = None
+
+    def do_action(self, action: Action):
+        """
+        :param action: gets a legal action
+        preforms the action on the current board
+        :return: an undo record (action, eaten tile, last_eat_red,
+                 last_eat_black, key, to_move) to pass to undo_action
+        """
+        start_square = action.start_point[0] * self.width + action.start_point[1]
+        end_square = action.end_point[0] * self.width + action.end_point[1]
+        start, end = 1 << start_square, 1 << end_square
+        eaten = Tile.EMPTY
+        record = (self.last_eat_red, self.last_eat_black, self.key, self.to_move)
+        zobrist = self.zobrist
+        key = self.key ^ zobrist.get_counters_key(self.last_eat_red,
+                                                  self.last_eat_black)
+        if action.color == Tile.RED:
+            self.last_eat_red += 1
+            if self.black_bits & end:
+                eaten = Tile.BLACK
+                self.black_count -= 1
+                self.black_bits ^= end
+                self.last_eat_red = 0
+            self.red_bits ^= start | end
+            self.to_move = Tile.BLACK
+        else:
+            self.last_eat_black += 1
+            if self.red_bits & end:
+                eaten = Tile.RED
+                self.red_count -= 1
+                self.red_bits ^= end
+                self.last_eat_black = 0
+            self.black_bits ^= start | end
+            self.to_move = Tile.RED
+        key ^= zobrist.get_action_key(action.color, start_square, end_square,
+                                      eaten)
+        self._update_position_scores(action.color, start_square, end_square,
+                                     eaten, 1)
+        key ^= zobrist.get_counters_key(self.last_eat_red, self.last_eat_black)
+        if (record[3] == Tile.BLACK) != (self.to_move == Tile.BLACK):
+            key ^= zobrist.black_to_move
+        self.key = key
+        self._np_board = None
+        return (action, eaten) + record
+
+    def undo_action(self, record):
+        """
+        :param record: the undo record returned by do_action
+        restores the board exactly to how it was before that action, the
+        actions done after it must be undone first
+        """
+        action, eaten, self.last_eat_red, self.last_eat_black, \
+            self.key, self.to_move = record
+        start_square = action.start_point[0] * self.width + action.start_point[1]
+        end_square = action.end_point[0] * self.width + action.end_point[1]
+        start, end = 1 << start_square, 1 << end_square
+        if action.color == Tile.RED:
+            self.red_bits ^= start | end
+            if eaten == Tile.BLACK:
+                self.black_count += 1
+                self.black_bits |= end
+        else:
+            self.black_bits ^= start | end
+            if eaten == Tile.RED:
+                self.red_count += 1
+                self.red_bits |= end
+        self._update_position_scores(action.color, start_square, end_square,
+                                     eaten, -1)
+        self._np_board = None
+
+    def print_board(self):  # textual. WITHOUT loops
+        """
+        prints the board to the terminal
+        """
+        board = self.get_np_board()
+        for i in range(len(board)):
+            print(f'[{i}]', board[i])
+        print('   ', np.arange(self.width))
+
+    def get_np_board(self):
+        """
+        :return: returns the board as a numpy array of tiles, the same as
+                 Board.get_np_board (cached until the next change)
+        """
+        if self._np_board is None:
+            board = np.full((self.height, self.width), Tile.EMPTY, dtype=Tile)
+            for color in (Tile.BLACK, Tile.RED):
+                for square in self._iter_squares(self._get_bits(color)):
+                    board[divmod(square, self.width)] = color
+            self._np_board = board
+        return self._np_board
+
+    @property
+    def board(self):
+        """
+        :return: the board as a numpy array, for code that reads Board.board
+        """
+        return self.get_np_board()
+
+    def get_pieces_positions(self, color: Tile):
+        """
+        :param color: the color interested
+        :return: a set of (y,x) for all positions in the board with the given color
+        """
+        return set(divmod(square, self.width)
+                   for square in self._iter_squares(self._get_bits(color)))
+
+    def revert_action(self, action: Action, changed_tile: Tile):
+        """
+        :param action: the action to revert
+        :param changed_tile: the tile that was eaten by the action
+        the function reverts the last action preformed
+        """
+        self._set_tile(action.get_start_point(), action.get_color())
+        self._set_tile(action.get_end_point(), changed_tile)
+        self.key = self.zobrist.compute_key(self)
+        self.position_scores = {color: compute_position_scores(self, color)
+                                for color in (Tile.RED, Tile.BLACK)}
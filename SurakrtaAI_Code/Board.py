@@ -7,14 +7,46 @@
 #   ###    ##    ##      ##     ## ###   #### #### #### #### #### #### ####
 
 import numpy as np
+from abc import ABC, abstractmethod
 from itertools import cycle
 from Enums import Tile, LoopDirection
+from Circuits import init_portal_dict, portal_direction, get_circuits
+from Zobrist import get_zobrist_keys
+from PositionTables import get_position_tables, compute_position_scores
 
 HEIGHT = 6
 WIDTH = 6
+# a move is packed into one int: start | end << SQUARE_BITS, or'ed with
+# CAPTURE_FLAG for a loop action, the squares are y * width + x
+SQUARE_BITS = 8
+SQUARE_MASK = (1 << SQUARE_BITS) - 1
+CAPTURE_FLAG = 1 << (2 * SQUARE_BITS)
+# the number of attack maps a board keeps, the cache is cleared once full
+ATTACK_CACHE_SIZE = 64
+
+
+def encode_move(start: int, end: int, capture=False) -> int:
+    """
+    :param start: the square the tile moves from
+    :param end: the square the tile moves to
+    :param capture: true iff the move is a loop action
+    :return: the packed move
+    """
+    return start | end << SQUARE_BITS | (CAPTURE_FLAG if capture else 0)
+
+
+def decode_move(move: int) -> (int, int, bool):
+    """
+    :param move: a packed move
+    :return: a tuple (start, end, capture) of the move
+    """
+    return move & SQUARE_MASK, move >> SQUARE_BITS & SQUARE_MASK, \
+        bool(move & CAPTURE_FLAG)
 
 
 class Action:  # always legal
+    __slots__ = ('color', 'start_point', 'end_point')
+
     def __init__(self, color, point1, point2):
         """
         :param color: the color of the current action
@@ -31,12 +63,33 @@ class Action:  # always legal
                self.end_point == other.end_point
 
     def __hash__(self):
-        return hash(self.__repr__())
+        # not the repr: str hashes change between processes, int tuples don't
+        return hash((self.start_point, self.end_point))
 
     def __repr__(self):
         return repr(self.color) + ' ' + str(self.start_point) + ' ' + str(
             self.end_point)
 
+    @staticmethod
+    def from_move(color, move: int, width: int):
+        """
+        :param color: the color of the player doing the move
+        :param move: a packed move
+        :param width: the width of the board
+        :return: the action of the packed move
+        """
+        start, end = move & SQUARE_MASK, move >> SQUARE_BITS & SQUARE_MASK
+        return Action(color, divmod(start, width), divmod(end, width))
+
+    def get_move(self, width: int, capture=False) -> int:
+        """
+        :param width: the width of the board
+        :param capture: true iff the action is a loop action
+        :return: the packed move of the action
+        """
+        return encode_move(self.start_point[0] * width + self.start_point[1],
+                           self.end_point[0] * width + self.end_point[1], capture)
+
     def get_color(self):
         """
         :return: the color of the player doing the action
@@ -56,33 +109,212 @@ class Action:  # always legal
         return self.end_point
 
 
-class Board:  # turns out to be Board
+class AttackMap:
+    """
+    what the pieces of one color reach through the loops in a position: the
+    enemies they can capture and their own pieces they protect
+    """
+    __slots__ = ('captures', 'attacked', 'defended', 'pairs')
+
+    def __init__(self):
+        # the packed capture moves, in the order of the moving pieces
+        self.captures = []
+        # enemy square --> the number of pieces that can capture it
+        self.attacked = {}
+        # own square --> the number of other own pieces that would recapture
+        # on it, they reach it through a loop
+        self.defended = {}
+        self.pairs = set()
+
+    def add(self, start: int, end: int, enemy: bool):
+        """
+        :param start: the square of the piece
+        :param end: the square of the first piece it reaches through a loop
+        :param enemy: true iff the piece in end is an enemy
+        """
+        # two rays may reach the same piece
+        if (start, end) in self.pairs:
+            return
+        self.pairs.add((start, end))
+        if enemy:
+            self.captures.append(start | end << SQUARE_BITS | CAPTURE_FLAG)
+            self.attacked[end] = self.attacked.get(end, 0) + 1
+        else:
+            self.defended[end] = self.defended.get(end, 0) + 1
+
+    def get_hanging(self, enemy_map) -> int:
+        """
+        :param enemy_map: the attack map of the enemy in the same position
+        :return: the number of own pieces the enemy can capture and no own
+                 piece would recapture
+        """
+        return sum(1 for square in enemy_map.attacked
+                   if square not in self.defended)
+
+
+class BaseBoard(ABC):
+    """
+    the part of the board API that does not depend on how the tiles are
+    stored, shared by Board and BitBoard.BitBoard
+    """
+
+    def is_legal_index(self, y: int, x: int) -> bool:
+        """
+        :param y: gets the y in the board
+        :param x: gets the x in the board
+        :return: returns true if the (y,x) is a valid entry in the board
+        """
+        return 0 <= y < self.height and 0 <= x < self.width
+
+    @abstractmethod
+    def _compute_attack_map(self, player: Tile) -> AttackMap:
+        """
+        :param player: the color of the pieces
+        :return: the attack map of player, scanning all the circuits
+        """
+
+    def get_attack_map(self, player: Tile) -> AttackMap:
+        """
+        :param player: the color of the pieces
+        :return: the attack map of player in the current position, computed
+                 once per position and color
+        """
+        cache_key = (self.key, player)
+        attack_map = self.attack_maps.get(cache_key)
+        if attack_map is None:
+            if len(self.attack_maps) >= ATTACK_CACHE_SIZE:
+                self.attack_maps.clear()
+            attack_map = self._compute_attack_map(player)
+            self.attack_maps[cache_key] = attack_map
+        return attack_map
+
+    @abstractmethod
+    def get_legal_moves(self, player: Tile, moves=None) -> list:
+        """
+        :param player: the color of the player to check
+        :param moves: a list to reuse for the result, cleared first
+        :return: the packed moves of all the legal actions of the player
+        """
+
+    def get_capture_moves(self, player: Tile, moves=None) -> list:
+        """
+        :param player: the color of the player to check
+        :param moves: a list to reuse for the result, cleared first
+        :return: the packed moves of the legal loop (eating) actions
+        """
+        if moves is None:
+            moves = []
+        else:
+            moves.clear()
+        moves.extend(self.get_attack_map(player).captures)
+        return moves
+
+    def get_legal_actions(self, player: Tile):
+        """
+        :param player: the color of the player to check
+        :return: all the legal actions to the player as a set
+        """
+        return {Action.from_move(player, move, self.width)
+                for move in self.get_legal_moves(player)}
+
+    def get_capture_actions(self, player: Tile):
+        """
+        :param player: the color of the player to check
+        :return: only the legal loop (eating) actions of the player as a set
+        """
+        return {Action.from_move(player, move, self.width)
+                for move in self.get_capture_moves(player)}
+
+    @abstractmethod
+    def _has_same_tiles(self, other) -> bool:
+        """
+        :param other: a board of the same backend
+        :return: true iff both boards have the same tiles in every square
+        """
+
+    def __hash__(self):
+        return self.key
+
+    def __eq__(self, other):
+        return self.key == other.key and \
+               self._has_same_tiles(other) and \
+               self.to_move == other.to_move and \
+               self.last_eat_red == other.last_eat_red and \
+               self.last_eat_black == other.last_eat_black
+
+    def is_legal_action(self, action: Action) -> bool:
+        """
+        :param action: gets an action
+        :return: true iff the action is legal in the current board
+        """
+        return action in self.get_legal_actions(action.get_color())
+
+    def _update_position_scores(self, color, start, end, eaten, sign):
+        """
+        :param color: the color of the moving tile
+        :param start: the square the tile moves from
+        :param end: the square the tile moves to
+        :param eaten: the tile that was in end before the move
+        :param sign: 1 when the move is done, -1 when it is undone
+        """
+        own = self.position_scores[color]
+        for index, table in enumerate(self.position_tables):
+            own[index] += sign * (table[end] - table[start])
+        if eaten != Tile.EMPTY:
+            enemy = self.position_scores[eaten]
+            for index, table in enumerate(self.position_tables):
+                enemy[index] -= sign * table[end]
+
+    def get_num_pieces(self, color: Tile):
+        """
+        :param color: the color
+        :return: the number of pieces in the board of the given color
+        """
+        return self.red_count if color == Tile.RED else self.black_count
+
+    def get_last_eating_move_red(self) -> int:
+        """
+        :return: the number of moves since the red ate
+        """
+        return self.last_eat_red
+
+    def get_last_eating_move_black(self) -> int:
+        """
+        :return: the number of moves since the black ate
+        """
+        return self.last_eat_black
+
+    def get_position_score(self, color: Tile, table=0) -> int:
+        """
+        :param color: the color of the pieces
+        :param table: the index of the table in POSITION_TABLES
+        :return: the sum of the table over the squares of the color's pieces
+        """
+        return self.position_scores[color][table]
+
+    def get_color_to_move(self) -> Tile:
+        """
+        :return: the color of the player that moves next, red moves first and
+                 every action passes the turn to the other color
+        """
+        return self.to_move
+
+    def get_key(self) -> int:
+        """
+        :return: the zobrist key of the position, it covers the tiles, the color
+                 to move and the no-capture counters
+        """
+        return self.key
+
+
+class Board(BaseBoard):  # turns out to be Board
 
     def init_portal_dict(self):
         """
         :return: this function creates a dictionary of (y,x) --> (y_new, x_new)
                  which corresponds to the loops out of bounds in the game
         """
-        mapping = {}
-        # top half
-        for y in range(1, self.height // 2):
-            # first quarter (left)
-            mapping[(y, 0)] = (0, y)
-            mapping[(0, y)] = (y, 0)
-            # second quarter (right)
-            mapping[(y, self.width - 1)] = (0, self.width - 1 - y)
-            mapping[(0, self.width - 1 - y)] = (y, self.width - 1)
-        # bottom half
-        for y in range(self.height - 2,
-                       self.height // 2 - 1 * (not self.height % 2), -1):
-            # third quarter (left)
-            mapping[(y, 0)] = (self.height - 1, self.width - 1 - y)
-            mapping[(self.height - 1, self.width - 1 - y)] = (y, 0)
-            # fourth quarter (right)
-            mapping[(self.height - 1, y)] = (y, self.width - 1)
-            mapping[(y, self.width - 1)] = (self.height - 1, y)
-
-        return mapping
+        return init_portal_dict(self.height, self.width)
 
     def __init__(self, height=HEIGHT, width=WIDTH):
         """
@@ -96,18 +328,20 @@ class Board:  # turns out to be Board
         self.board[:(self.height // 2 - 1), :] = Tile.BLACK
         self.board[-(self.height // 2 - 1):, :] = Tile.RED
         self.portal_dict = self.init_portal_dict()
+        self.circuits = get_circuits(self.height, self.width)
         self.red_count = np.sum(self.board == Tile.RED)
         self.black_count = np.sum(self.board == Tile.BLACK)
         self.last_eat_red = 0
         self.last_eat_black = 0
-
-    def is_legal_index(self, y: int, x: int) -> bool:
-        """
-        :param y: gets the y in the board
-        :param x: gets the x in the board
-        :return: returns true if the (y,x) is a valid entry in the board
-        """
-        return 0 <= y < self.height and 0 <= x < self.width
+        self.to_move = Tile.RED
+        self.zobrist = get_zobrist_keys(self.height, self.width)
+        self.key = self.zobrist.compute_key(self)
+        self.position_tables = get_position_tables(self.height, self.width)
+        # color --> the running scores of its pieces, one per position table
+        self.position_scores = {color: compute_position_scores(self, color)
+                                for color in (Tile.RED, Tile.BLACK)}
+        # (key, color) --> the AttackMap of the color in the position
+        self.attack_maps = {}
 
     def _check_tile(self, y: int, x: int, tile: Tile) -> bool:
         """
@@ -119,21 +353,19 @@ class Board:  # turns out to be Board
         """
         return self.is_legal_index(y, x) and self.board[y, x] == tile
 
-    def _get_king_actions(self, y: int, x: int, player: Tile) -> set:
+    def _get_king_moves(self, y: int, x: int, moves: list):
         """
         :param y: the y of the tile we want to find the actions where we can move it to
         :param x: the x of the tile we want to find the actions where we can move it to
-        :param player: the color of the player making the move
-        :return: the legal king actions from position (y,x) for player player
+        :param moves: the list to append the packed king moves from (y,x) to
         """
-        king_actions = set()
+        start = y * self.width + x
         for i in range(-1, 2):
             for j in range(-1, 2):
                 if i == 0 and j == 0:
                     continue
                 if self._check_tile(y + j, x + i, Tile.EMPTY):
-                    king_actions.add(Action(player, (y, x), (y + j, x + i)))
-        return king_actions
+                    moves.append(start | ((y + j) * self.width + x + i) << SQUARE_BITS)
 
     def portal(self, y: int, x: int) -> (int, int, LoopDirection):
         """
@@ -142,116 +374,146 @@ class Board:  # turns out to be Board
         :return: a tuple (y, x, direction) representing the next part of the loop
         """
         y, x = self.portal_dict[(y, x)]
-        if y == 0:
-            return y, x, LoopDirection.DOWN
-        elif y == self.height - 1:
-            return y, x, LoopDirection.UP
-        elif x == 0:
-            return y, x, LoopDirection.RIGHT
-        return y, x, LoopDirection.LEFT
-
-    def _get_loop_action(self, y, x, direction, player):
-        """
-        :param y: the current y
-        :param x: the current x
-        :param direction: the direction we loop through
-        :param player: the color of the player
-        :return: the enemy found in that direction on None
-                 if we didn't encounter an enemy
-        """
-        for loop_count in range(5):  # portals
-            # run to the next portal / another piece
-            y_dir, x_dir = direction.value
-            while self._check_tile(y, x, Tile.EMPTY):
-                y, x = y + y_dir, x + x_dir
-            #
-            if not self.is_legal_index(y, x) and (y - y_dir, x - x_dir) in self.portal_dict:
-                y, x, direction = self.portal(y - y_dir, x - x_dir)
-            # we reached a player without going through a portal or it
-            # is our player so we can't eat it
-            elif loop_count == 0 or self.board[y, x] == player:
-                return None
-            # we reached the enemy player so we can eat it
-            else:
-                return y, x
+        return y, x, portal_direction(y, x, self.height)
+
+    def _get_loop_target(self, y, x, ray):
+        """
+        :param y: the y of the moving tile
+        :param x: the x of the moving tile
+        :param ray: a ray of the circuits leaving (y, x)
+        :return: the first tile along the ray if it is reached through a loop,
+                 else None
+        """
+        for point, _, loops in ray:
+            # the moving tile leaves its square, so it never blocks itself
+            if point == (y, x) or self.board[point] == Tile.EMPTY:
+                continue
+            # we reached a tile without going through a loop
+            return point if loops else None
         return None
 
-    def _get_loop_actions(self, y, x, directions, player):
+    def _compute_attack_map(self, player: Tile) -> AttackMap:
         """
-        :param y: the current y
-        :param x: the current x
-        :param directions: the directions we search in
-        :param player: the player to search actions for
-        :return: all the loop move actions that can be preformed by player
-                 from points (y, x) via the given directions
-        """
-        temp, self.board[y, x] = self.board[y, x], Tile.EMPTY
-        locs = set()
-        for direction in directions:
-            val = self._get_loop_action(y, x, direction, player)
-            if val is not None and val not in locs:
-                locs.add(Action(player, (y, x), val))
-        self.board[y, x] = temp
-        return locs
+        :param player: the color of the pieces
+        :return: the attack map of player, scanning all the circuits
+        """
+        attack_map = AttackMap()
+        ys, xs = np.where(self.board == player)
+        for y, x in zip(ys.tolist(), xs.tolist()):
+            for ray in self.circuits.get_rays(y, x):
+                point = self._get_loop_target(y, x, ray)
+                if point is not None:
+                    attack_map.add(y * self.width + x,
+                                   point[0] * self.width + point[1],
+                                   self.board[point] != player)
+        return attack_map
 
-    def get_legal_actions(self, player: Tile):
+    def get_legal_moves(self, player: Tile, moves=None) -> list:
         """
         :param player: the color of the player to check
-        :return: all the legal actions to the player as a set
+        :param moves: a list to reuse for the result, cleared first
+        :return: the packed moves of all the legal actions of the player
         """
+        if moves is None:
+            moves = []
+        else:
+            moves.clear()
         ys, xs = np.where(self.board == player)
-        legal_actions = set()
         # get free not eating move
-        for y, x in zip(ys, xs):
-            legal_actions.update(self._get_king_actions(y, x, player))
-        # calculate eating move
-        directions = [LoopDirection.UP, LoopDirection.DOWN,
-                      LoopDirection.LEFT, LoopDirection.RIGHT]
-        for y, x in zip(ys, xs):
-            legal_actions.update(self._get_loop_actions(y, x, directions, player))
-        return legal_actions
+        for y, x in zip(ys.tolist(), xs.tolist()):
+            self._get_king_moves(y, x, moves)
+        # the eating moves come from the attack map
+        moves.extend(self.get_attack_map(player).captures)
+        return moves
 
-    def __hash__(self):
-        return hash(self.board)
-
-    def __eq__(self, other):
-        return self.board == other.board
+    def _has_same_tiles(self, other) -> bool:
+        """
+        :param other: a board of the same backend
+        :return: true iff both boards have the same tiles in every square
+        """
+        return np.array_equal(self.board, other.board)
 
     def __copy__(self):
         copy_board = Board(0, 0)
         copy_board.height, copy_board.width = self.height, self.width
         copy_board.board = np.copy(self.board)
         copy_board.portal_dict = self.portal_dict
+        copy_board.circuits = self.circuits
         copy_board.red_count = self.red_count
         copy_board.black_count = self.black_count
         copy_board.last_eat_black = self.last_eat_black
         copy_board.last_eat_red = self.last_eat_red
+        copy_board.to_move = self.to_move
+        copy_board.zobrist = self.zobrist
+        copy_board.key = self.key
+        copy_board.position_tables = self.position_tables
+        copy_board.position_scores = {color: scores.copy() for color, scores
+                                      in self.position_scores.items()}
+        copy_board.attack_maps = {}
         return copy_board
 
-    def is_legal_action(self, action: Action) -> bool:
+    def is_capture_action(self, action: Action) -> bool:
         """
-        :param action: gets an action
-        :return: true iff the action is legal in the current board
+        :param action: gets a legal action
+        :return: true iff the action eats a tile (a loop action)
         """
-        return action in self.get_legal_actions(action.get_color())
+        return self.board[action.end_point] != Tile.EMPTY
 
     def do_action(self, action: Action):
         """
         :param action: gets a legal action
         preforms the action on the current board
-        """
+        :return: an undo record (action, eaten tile, last_eat_red,
+                 last_eat_black, key, to_move) to pass to undo_action
+        """
+        eaten = self.board[action.end_point]
+        record = (action, eaten, self.last_eat_red, self.last_eat_black,
+                  self.key, self.to_move)
+        zobrist = self.zobrist
+        key = self.key ^ zobrist.get_counters_key(self.last_eat_red,
+                                                  self.last_eat_black)
         if action.color == Tile.RED:
             self.last_eat_red += 1
         else:
             self.last_eat_black += 1
-        if self.board[action.end_point] == Tile.RED:
+        if eaten == Tile.RED:
             self.red_count -= 1
             self.last_eat_black = 0
-        if self.board[action.end_point] == Tile.BLACK:
+        if eaten == Tile.BLACK:
             self.black_count -= 1
             self.last_eat_red = 0
         self.board[action.end_point] = self.board[action.start_point]
         self.board[action.start_point] = Tile.EMPTY
+        start = action.start_point[0] * self.width + action.start_point[1]
+        end = action.end_point[0] * self.width + action.end_point[1]
+        key ^= zobrist.get_action_key(action.color, start, end, eaten)
+        self._update_position_scores(action.color, start, end, eaten, 1)
+        key ^= zobrist.get_counters_key(self.last_eat_red, self.last_eat_black)
+        if self.to_move == Tile.BLACK:
+            key ^= zobrist.black_to_move
+        self.to_move = Tile.BLACK if action.color == Tile.RED else Tile.RED
+        if self.to_move == Tile.BLACK:
+            key ^= zobrist.black_to_move
+        self.key = key
+        return record
+
+    def undo_action(self, record):
+        """
+        :param record: the undo record returned by do_action
+        restores the board exactly to how it was before that action, the
+        actions done after it must be undone first
+        """
+        action, eaten, self.last_eat_red, self.last_eat_black, \
+            self.key, self.to_move = record
+        self.board[action.start_point] = self.board[action.end_point]
+        self.board[action.end_point] = eaten
+        if eaten == Tile.RED:
+            self.red_count += 1
+        elif eaten == Tile.BLACK:
+            self.black_count += 1
+        self._update_position_scores(
+            action.color, action.start_point[0] * self.width + action.start_point[1],
+            action.end_point[0] * self.width + action.end_point[1], eaten, -1)
 
     def print_board(self):  # textual. WITHOUT loops
         """
@@ -261,13 +523,6 @@ class Board:  # turns out to be Board
             print(f'[{i}]', self.board[i])
         print('   ', np.arange(WIDTH))
 
-    def get_num_pieces(self, color: Tile):
-        """
-        :param color: the color
-        :return: the number of pieces in the board of the given color
-        """
-        return self.red_count if color == Tile.RED else self.black_count
-
     def get_np_board(self):
         """
         :return: returns the board as a numpy array
@@ -280,7 +535,24 @@ class Board:  # turns out to be Board
         :return: a set of (y,x) for all positions in the board with the given color
         """
         ys, xs = np.where(self.board == color)
-        return set((y, x) for y, x in zip(ys, xs))
+        return set((y, x) for y, x in zip(ys.tolist(), xs.tolist()))
+
+    def set_tiles(self, tiles, to_move=Tile.RED):
+        """
+        :param tiles: a (height, width) array of the tiles of a position
+        :param to_move: the color to move in the position
+        sets the board to the position, with both no-capture counters at 0
+        """
+        self.board = np.array(tiles, dtype=Tile)
+        self.red_count = np.sum(self.board == Tile.RED)
+        self.black_count = np.sum(self.board == Tile.BLACK)
+        self.last_eat_red = 0
+        self.last_eat_black = 0
+        self.to_move = to_move
+        self.key = self.zobrist.compute_key(self)
+        self.position_scores = {color: compute_position_scores(self, color)
+                                for color in (Tile.RED, Tile.BLACK)}
+        self.attack_maps = {}
 
     def revert_action(self, action: Action, changed_tile: Tile):
         """
@@ -290,27 +562,21 @@ class Board:  # turns out to be Board
         """
         self.board[action.get_start_point()] = action.get_color()
         self.board[action.get_end_point()] = changed_tile
-
-    def get_last_eating_move_red(self) -> int:
-        """
-        :return: the number of moves since the red ate
-        """
-        return self.last_eat_red
-
-    def get_last_eating_move_black(self) -> int:
-        """
-        :return: the number of moves since the black ate
-        """
-        return self.last_eat_black
+        self.key = self.zobrist.compute_key(self)
+        self.position_scores = {color: compute_position_scores(self, color)
+                                for color in (Tile.RED, Tile.BLACK)}
 
 
 class Surakarta:  # Game
-    def __init__(self, black_player, red_player, height=HEIGHT, width=WIDTH):
+    def __init__(self, black_player, red_player, height=HEIGHT, width=WIDTH,
+                 board_type=Board):
         """
         :param black_player: an object of black player
         :param red_player: an object of red player
         :param height: the height of the board
         :param width: the width of the board
+        :param board_type: the board implementation to play on (Board or
+                           BitBoard.BitBoard)
         """
         # players are (currently) Player.HUMAN/Player.AI
         self.black_player = black_player
@@ -320,7 +586,7 @@ class Surakarta:  # Game
         self.cur_player_iter = cycle([self.red_player, self.black_player])
         self.cur_player = next(self.cur_player_iter)
         # self.cur_player = Tile.BLACK
-        self.board = Board(height, width)
+        self.board = board_type(height, width)
         self.legal_moves = self.board.get_legal_actions(self.cur_player.get_color())
 
     def move(self) -> bool:
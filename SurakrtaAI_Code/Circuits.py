@@ -0,0 +1,158 @@
+from functools import lru_cache
+from Enums import LoopDirection
+
+# the maximal number of loops (arcs) a capture may go through
+MAX_ARCS = 4
+
+
+def init_portal_dict(height, width):
+    """
+    :param height: the height of the board
+    :param width: the width of the board
+    :return: this function creates a dictionary of (y,x) --> (y_new, x_new)
+             which corresponds to the loops out of bounds in the game
+    """
+    mapping = {}
+    # top half
+    for y in range(1, height // 2):
+        # first quarter (left)
+        mapping[(y, 0)] = (0, y)
+        mapping[(0, y)] = (y, 0)
+        # second quarter (right)
+        mapping[(y, width - 1)] = (0, width - 1 - y)
+        mapping[(0, width - 1 - y)] = (y, width - 1)
+    # bottom half
+    for y in range(height - 2,
+                   height // 2 - 1 * (not height % 2), -1):
+        # third quarter (left)
+        mapping[(y, 0)] = (height - 1, width - 1 - y)
+        mapping[(height - 1, width - 1 - y)] = (y, 0)
+        # fourth quarter (right)
+        mapping[(height - 1, y)] = (y, width - 1)
+        mapping[(y, width - 1)] = (height - 1, y)
+
+    return mapping
+
+
+def portal_direction(y: int, x: int, height: int) -> LoopDirection:
+    """
+    :param y: the y of the square a loop ends in
+    :param x: the x of the square a loop ends in
+    :param height: the height of the board
+    :return: the direction the loop continues in from (y, x)
+    """
+    if y == 0:
+        return LoopDirection.DOWN
+    elif y == height - 1:
+        return LoopDirection.UP
+    elif x == 0:
+        return LoopDirection.RIGHT
+    return LoopDirection.LEFT
+
+
+class Circuits:
+    """
+    the loops of the board as ordered rings of squares. every circuit is kept
+    in both orientations, so a ring is always scanned forwards
+    """
+
+    def __init__(self, height, width):
+        """
+        builds the rings by walking every loop of an empty board once
+        :param height: the height of the board
+        :param width: the width of the board
+        """
+        self.height, self.width = height, width
+        self.portal_dict = init_portal_dict(height, width)
+        # rings[r] is a tuple of (y, x), arcs[r][i] is true iff going from
+        # rings[r][i] to the next square of the ring goes through a loop
+        self.rings, self.arcs = [], []
+        # (y, x) --> a list of (ring, index, direction) of the square
+        self.positions = {}
+        self._build_rings()
+        # (y, x) --> a tuple of rays, one per ring position of the square. a
+        # ray is a tuple of ((y, x), square, loops passed) in scanning order
+        self.rays = {point: tuple(self._build_ray(ring, index)
+                                  for ring, index, _ in positions)
+                     for point, positions in self.positions.items()}
+
+    def _build_rings(self):
+        """
+        walks from every loop exit until it comes back to where it started
+        """
+        visited = set()
+        for exit_point in self.portal_dict:
+            start = self._portal(*exit_point)
+            if start in visited:
+                continue
+            ring, arcs, directions = [], [], []
+            y, x, direction = start
+            while True:
+                visited.add((y, x, direction))
+                y_dir, x_dir = direction.value
+                while 0 <= y < self.height and 0 <= x < self.width:
+                    ring.append((y, x))
+                    arcs.append(False)
+                    directions.append(direction)
+                    y, x = y + y_dir, x + x_dir
+                arcs[-1] = True
+                if (y - y_dir, x - x_dir) not in self.portal_dict:
+                    ring = None  # the walk leaves the board, not a circuit
+                    break
+                y, x, direction = self._portal(y - y_dir, x - x_dir)
+                if (y, x, direction) == start:
+                    break
+            if ring is None:
+                continue
+            index = len(self.rings)
+            for i, point in enumerate(ring):
+                self.positions.setdefault(point, []).append(
+                    (index, i, directions[i]))
+            self.rings.append(tuple(ring))
+            self.arcs.append(tuple(arcs))
+
+    def _portal(self, y, x):
+        """
+        :param y: the y of the last square before the loop
+        :param x: the x of the last square before the loop
+        :return: a tuple (y, x, direction) where the loop leads to
+        """
+        y, x = self.portal_dict[(y, x)]
+        return y, x, portal_direction(y, x, self.height)
+
+    def _build_ray(self, ring, index):
+        """
+        :param ring: the ring index
+        :param index: the position of the starting square in the ring
+        :return: the squares after the given position, up to the last one
+                 reachable without passing more than MAX_ARCS loops
+        """
+        squares, arcs = self.rings[ring], self.arcs[ring]
+        ray, loops = [], 0
+        while True:
+            if arcs[index]:
+                loops += 1
+                if loops > MAX_ARCS:
+                    return tuple(ray)
+            index = (index + 1) % len(squares)
+            y, x = squares[index]
+            ray.append(((y, x), y * self.width + x, loops))
+
+    def get_rays(self, y, x):
+        """
+        :param y: the y of the square
+        :param x: the x of the square
+        :return: the rays leaving (y, x) along the circuits, empty if the square
+                 is not on any circuit
+        """
+        return self.rays.get((y, x), ())
+
+
+@lru_cache(maxsize=None)
+def get_circuits(height, width) -> Circuits:
+    """
+    :param height: the height of the board
+    :param width: the width of the board
+    :return: the circuits of a board of the given size, built once per size
+    """
+    return Circuits(height, width)
@@ -20,3 +20,14 @@ class LoopDirection(Enum):
     UP = (-1, 0)
     LEFT = (0, -1)
     RIGHT = (0, 1)
+
+
+class Parallelism(Enum):
+    ROOT = 0
+    LEAF = 1
+
+
+class Bound(Enum):
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
@@ -1,21 +1,8 @@
 from Enums import Tile
 from Board import Board
+from PositionTables import position_array, position_array_2, get_position_arrays
 import numpy as np
 
-position_array = np.array([[0, 5, 5, 5, 5, 0],
-                           [5, 10, 20, 20, 10, 5],
-                           [5, 20, 10, 10, 20, 5],
-                           [5, 20, 10, 10, 20, 5],
-                           [5, 10, 20, 20, 10, 5],
-                           [0, 5, 5, 5, 5, 0]])
-
-position_array_2 = np.array([[0, 5, 5, 5, 5, 0],
-                             [5, 20, 10, 10, 20, 5],
-                             [5, 10, 20, 20, 10, 5],
-                             [5, 10, 20, 20, 10, 5],
-                             [5, 20, 10, 10, 20, 5],
-                             [0, 5, 5, 5, 5, 0]])
-
 
 def switch_color(color: Tile):
     """
@@ -42,7 +29,7 @@ def position_heuristic(board: Board, player_color: Tile):
     :return: a number that combines evaluate the board via the position of the
     pieces
     """
-    return np.sum(position_array * (board.get_np_board() == player_color))
+    return board.get_position_score(player_color)
 
 
 def position2_heuristic(board: Board, player_color: Tile):
@@ -52,7 +39,7 @@ def position2_heuristic(board: Board, player_color: Tile):
     :return: a number that combines evaluate the board via the position of the
     pieces, another evaluator
     """
-    return np.sum(position_array_2 * (board.get_np_board() == player_color))
+    return board.get_position_score(player_color, 1)
 
 
 def attack_heuristic(board: Board, player_color: Tile):
@@ -84,3 +71,152 @@ def smart_heuristic(board: Board, player_color: Tile):
     return position_heuristic(board, player_color) * 0.1 + \
            attack_heuristic(board, player_color) + \
            defensive_heuristic(board, player_color)
+
+
+def mobility_heuristic(board: Board, player_color: Tile):
+    """
+    :param board: the board object
+    :param player_color: the given color
+    :return: a number that evaluates the board via how many more moves the
+    player has than the opponent, the captures come from the attack maps
+    """
+    return len(board.get_legal_moves(player_color)) - \
+        len(board.get_legal_moves(switch_color(player_color)))
+
+
+def threat_heuristic(board: Board, player_color: Tile):
+    """
+    :param board: the board object
+    :param player_color: the given color
+    :return: a number that evaluates the board via how many enemy pieces the
+    player threatens to eat against how many of its pieces are threatened
+    """
+    return len(board.get_attack_map(player_color).attacked) - \
+        len(board.get_attack_map(switch_color(player_color)).attacked)
+
+
+def hanging_heuristic(board: Board, player_color: Tile):
+    """
+    :param board: the board object
+    :param player_color: the given color
+    :return: a number that evaluates the board via the threatened pieces no
+    piece of their color would recapture, the enemy's against the player's
+    """
+    own = board.get_attack_map(player_color)
+    enemy = board.get_attack_map(switch_color(player_color))
+    return enemy.get_hanging(own) - own.get_hanging(enemy)
+
+
+def get_int_board(board) -> np.ndarray:
+    """
+    :param board: a board object of any backend
+    :return: the board as a (height, width) int array of the tile values
+    """
+    int_board = np.zeros((board.height, board.width), dtype=np.int8)
+    for color in (Tile.RED, Tile.BLACK):
+        points = board.get_pieces_positions(color)
+        if points:
+            int_board[tuple(zip(*points))] = color.value
+    return int_board
+
+
+def get_children_boards(board, actions) -> np.ndarray:
+    """
+    :param board: a board object of any backend
+    :param actions: a list of legal actions in the board
+    :return: an (N, height, width) int array, the boards after every action
+    """
+    boards = np.repeat(get_int_board(board)[None], len(actions), axis=0)
+    rows = np.arange(len(actions))
+    start_ys, start_xs = zip(*(action.start_point for action in actions))
+    end_ys, end_xs = zip(*(action.end_point for action in actions))
+    boards[rows, end_ys, end_xs] = boards[rows, start_ys, start_xs]
+    boards[rows, start_ys, start_xs] = Tile.EMPTY.value
+    return boards
+
+
+def _count_pieces(boards: np.ndarray, color: Tile) -> np.ndarray:
+    """
+    :param boards: an (N, height, width) int array of boards
+    :param color: the color of the pieces
+    :return: the number of pieces of the color in every board
+    """
+    return np.count_nonzero(boards == color.value, axis=(1, 2))
+
+
+def basic_heuristic_batch(boards: np.ndarray, player_color: Tile):
+    """
+    :param boards: an (N, height, width) int array of boards
+    :param player_color: the given color
+    :return: the basic heuristic of every board
+    """
+    return _count_pieces(boards, player_color) - \
+        _count_pieces(boards, switch_color(player_color))
+
+
+def position_heuristic_batch(boards: np.ndarray, player_color: Tile):
+    """
+    :param boards: an (N, height, width) int array of boards
+    :param player_color: the given color
+    :return: the position heuristic of every board
+    """
+    table = get_position_arrays(*boards.shape[1:])[0]
+    return np.sum(table * (boards == player_color.value), axis=(1, 2))
+
+
+def position2_heuristic_batch(boards: np.ndarray, player_color: Tile):
+    """
+    :param boards: an (N, height, width) int array of boards
+    :param player_color: the given color
+    :return: the second position heuristic of every board
+    """
+    table = get_position_arrays(*boards.shape[1:])[1]
+    return np.sum(table * (boards == player_color.value), axis=(1, 2))
+
+
+def attack_heuristic_batch(boards: np.ndarray, player_color: Tile):
+    """
+    :param boards: an (N, height, width) int array of boards
+    :param player_color: the given color
+    :return: the attack heuristic of every board
+    """
+    return -_count_pieces(boards, switch_color(player_color))
+
+
+def defensive_heuristic_batch(boards: np.ndarray, player_color: Tile):
+    """
+    :param boards: an (N, height, width) int array of boards
+    :param player_color: the given color
+    :return: the defensive heuristic of every board
+    """
+    return _count_pieces(boards, player_color)
+
+
+def smart_heuristic_batch(boards: np.ndarray, player_color: Tile):
+    """
+    :param boards: an (N, height, width) int array of boards
+    :param player_color: the given color
+    :return: the smart heuristic of every board
+    """
+    return position_heuristic_batch(boards, player_color) * 0.1 + \
+        attack_heuristic_batch(boards, player_color) + \
+        defensive_heuristic_batch(boards, player_color)
+
+
+# heuristic --> its batch counterpart, which gives the same scores
+BATCH_HEURISTICS = {
+    basic_heuristic: basic_heuristic_batch,
+    position_heuristic: position_heuristic_batch,
+    position2_heuristic: position2_heuristic_batch,
+    attack_heuristic: attack_heuristic_batch,
+    defensive_heuristic: defensive_heuristic_batch,
+    smart_heuristic: smart_heuristic_batch
+}
+
+
+def get_batch_heuristic(heuristic):
+    """
+    :param heuristic: a heuristic of a single board
+    :return: its batch counterpart, or None if it has none
+    """
+    return BATCH_HEURISTICS.get(heuristic)
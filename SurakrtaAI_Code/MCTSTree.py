@@ -0,0 +1,294 @@
+import math
+import numpy as np
+from Board import Action
+from Heuristics import switch_color
+
+ROOT = 0
+NO_NODE = -1
+INITIAL_CAPACITY = 1024
+
+
+class MCTSTree:
+    """
+    a Monte Carlo search tree stored in preallocated arrays, a node is an index
+    to them. the children of a node are consecutive, node first_child + i is
+    created by the packed move actions[node][i]. the nodes hold no boards, the board of a node
+    is rebuilt by replaying the actions from the root board.
+    the children are created lazily: the actions of a node are listed when it
+    is visited again after its first rollout, and then one child is created
+    per visit, in the order of the actions
+    """
+
+    def __init__(self, board, color, widening=None, capacity=INITIAL_CAPACITY):
+        """
+        :param board: the board of the root, owned by the tree
+        :param color: the color to move in the root
+        :param widening: None to try every action of a node, or a tuple
+                         (constant, exponent) to allow a node with n visits
+                         only ceil(constant * n ** exponent) children
+        :param capacity: the number of nodes to allocate, grows when needed
+        """
+        self.board = board
+        self.color = color
+        self.widening = widening
+        self.visits = np.zeros(capacity, dtype=np.int64)
+        self.wins = np.zeros(capacity, dtype=np.float64)
+        # the sums of the squared rollout results, for the confidence of a node
+        self.squares = np.zeros(capacity, dtype=np.float64)
+        self.parent = np.full(capacity, NO_NODE, dtype=np.int32)
+        self.first_child = np.full(capacity, NO_NODE, dtype=np.int32)
+        self.num_children = np.zeros(capacity, dtype=np.int32)
+        self.action_index = np.full(capacity, NO_NODE, dtype=np.int32)
+        self.depth = np.zeros(capacity, dtype=np.int16)
+        # node --> the packed moves of its children, tried or not
+        self.actions = {}
+        self.size = 1
+
+    def _ensure_capacity(self, extra):
+        """
+        :param extra: the number of nodes about to be added
+        doubles the arrays until extra more nodes fit
+        """
+        capacity = len(self.visits)
+        if self.size + extra <= capacity:
+            return
+        while self.size + extra > capacity:
+            capacity *= 2
+        for name, fill in (('visits', 0), ('wins', 0), ('squares', 0), ('parent', NO_NODE),
+                           ('first_child', NO_NODE), ('num_children', 0),
+                           ('action_index', NO_NODE), ('depth', 0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def get_color(self, node):
+        """
+        :param node: a node of the tree
+        :return: the color to move in the node
+        """
+        return self.color if self.depth[node] % 2 == 0 else switch_color(self.color)
+
+    def get_action(self, node):
+        """
+        :param node: a node of the tree, not the root
+        :return: the action that leads from the parent of the node to it
+        """
+        parent = self.parent[node]
+        return Action.from_move(self.get_color(parent),
+                                self.actions[parent][self.action_index[node]],
+                                self.board.width)
+
+    def get_children(self, node):
+        """
+        :param node: a node of the tree
+        :return: a range of the created children of the node
+        """
+        first = self.first_child[node]
+        return range(first, first + self.num_children[node])
+
+    def get_path(self, node):
+        """
+        :param node: a node of the tree
+        :return: a list of the nodes from the node up to the root, included
+        """
+        path = [node]
+        while node != ROOT:
+            node = self.parent[node]
+            path.append(node)
+        return path
+
+    def replay(self, node):
+        """
+        :param node: a node of the tree
+        :return: the undo records of the actions done on self.board to bring
+                 it from the root to the node, pass them to undo_replay
+        """
+        return [self.board.do_action(self.get_action(node))
+                for node in reversed(self.get_path(node)[:-1])]
+
+    def undo_replay(self, records):
+        """
+        :param records: the records returned by replay
+        brings self.board back to the root
+        """
+        for record in reversed(records):
+            self.board.undo_action(record)
+
+    def can_expand(self, node):
+        """
+        :param node: a node of the tree
+        :return: true iff the node was not listed yet or may get another child
+        """
+        if node not in self.actions:
+            return True
+        width = len(self.actions[node])
+        if self.widening is not None:
+            constant, exponent = self.widening
+            width = min(width, math.ceil(constant * self.visits[node] ** exponent))
+        return self.num_children[node] < width
+
+    def _reserve(self, node, actions):
+        """
+        :param node: a node of the tree without a children block
+        :param actions: the packed moves of the node
+        reserves the consecutive block of the children of the node
+        """
+        count = len(actions)
+        self._ensure_capacity(count)
+        first = self.size
+        self.actions[node] = actions
+        self.first_child[node] = first
+        self.parent[first:first + count] = node
+        self.action_index[first:first + count] = np.arange(count)
+        self.depth[first:first + count] = self.depth[node] + 1
+        self.size += count
+
+    def expand(self, node):
+        """
+        :param node: a node of the tree that can expand, self.board must be
+                     replayed to it
+        :return: the next untried child of the node, or None if the node has
+                 no actions
+        """
+        if node not in self.actions:
+            self._reserve(node, self.board.get_legal_moves(self.get_color(node)))
+        if self.num_children[node] == len(self.actions[node]):
+            return None
+        self.num_children[node] += 1
+        return int(self.first_child[node] + self.num_children[node] - 1)
+
+    def get_simulations(self) -> int:
+        """
+        :return: the number of rollouts in the tree, kept when it is rerooted
+        """
+        return int(self.visits[ROOT])
+
+    def get_uct(self, node):
+        """
+        :param node: a node of the tree
+        :return: get the value of the node
+        """
+        visits = self.visits[node]
+        return (self.wins[node] / visits + (2 * np.log(self.get_simulations()) / visits) ** 0.5) \
+            if visits else float('inf')
+
+    def best_child_uct(self, node):
+        """
+        :param node: the node
+        :return: the best child of the node (unexplored is always better)
+        """
+        first = self.first_child[node]
+        last = first + self.num_children[node]
+        visits = self.visits[first:last]
+        unexplored = np.flatnonzero(visits == 0)
+        if len(unexplored):
+            return int(first + unexplored[0])
+        uct = self.wins[first:last] / visits + \
+            (2 * np.log(self.get_simulations()) / visits) ** 0.5
+        return int(first + np.argmax(uct))
+
+    def update(self, node, result, visits=1, square=None):
+        """
+        :param node: the node the simulations ran from
+        :param result: the sum of the results of the simulations
+        :param visits: the number of simulations
+        :param square: the sum of the squared results, result ** 2 if None
+        adds the simulations to every node on the path up to the root
+        """
+        path = self.get_path(node)
+        self.visits[path] += visits
+        self.wins[path] += result
+        self.squares[path] += result ** 2 if square is None else square
+
+    def find(self, board, depth=2):
+        """
+        :param board: a board object
+        :param depth: the depth of the nodes to look in
+        :return: a created node of the given depth whose position is the
+                 board, or None if there is none
+        """
+        nodes = [ROOT]
+        for _ in range(depth):
+            nodes = [child for node in nodes for child in self.get_children(node)]
+        for node in nodes:
+            records = self.replay(node)
+            found = self.board == board
+            self.undo_replay(records)
+            if found:
+                return node
+        return None
+
+    def reroot(self, node):
+        """
+        :param node: a node of the tree
+        :return: a new tree of the subtree of the node, with its statistics.
+                 the nodes out of the subtree are dropped and the rest are
+                 renumbered so that the children stay consecutive
+        """
+        records = self.replay(node)
+        tree = MCTSTree(self.board.__copy__(), self.get_color(node),
+                        self.widening, len(self.visits))
+        self.undo_replay(records)
+        tree.visits[ROOT], tree.wins[ROOT] = self.visits[node], self.wins[node]
+        tree.squares[ROOT] = self.squares[node]
+        queue = [(node, ROOT)]
+        for old, new in queue:
+            if old not in self.actions:
+                continue
+            tree._reserve(new, self.actions[old])
+            first, old_first = tree.first_child[new], self.first_child[old]
+            created = tree.num_children[new] = self.num_children[old]
+            tree.visits[first:first + created] = self.visits[old_first:old_first + created]
+            tree.wins[first:first + created] = self.wins[old_first:old_first + created]
+            tree.squares[first:first + created] = self.squares[old_first:old_first + created]
+            queue.extend((old_first + i, first + i) for i in range(created))
+        return tree
+
+    def get_root_statistics(self):
+        """
+        :return: a list of (action, visits, wins) of the children of the root
+        """
+        return [(self.get_action(child), int(self.visits[child]),
+                 float(self.wins[child])) for child in self.get_children(ROOT)]
+
+    def get_best_action(self):
+        """
+        :return: the action of the root child with the best average result so
+                 far, or None if no child was visited
+        """
+        statistics = [s for s in self.get_root_statistics() if s[1]]
+        if not statistics:
+            return None
+        action, _, _ = max(statistics, key=lambda s: s[2] / s[1])
+        return action
+
+    def is_decided(self, confidence):
+        """
+        :param confidence: the number of standard errors of the interval
+        :return: true iff every action of the root was visited twice and the
+                 interval of the best root child's average is above the
+                 intervals of all the others
+        """
+        if ROOT not in self.actions or \
+                self.num_children[ROOT] < len(self.actions[ROOT]) or \
+                self.num_children[ROOT] < 2:
+            return False
+        children = self.get_children(ROOT)
+        visits = self.visits[children.start:children.stop]
+        if visits.min() < 2:
+            return False
+        means = self.wins[children.start:children.stop] / visits
+        variances = np.maximum(self.squares[children.start:children.stop] / visits - means ** 2, 0)
+        errors = confidence * np.sqrt(variances / visits)
+        best = np.argmax(means)
+        upper = np.delete(means + errors, best)
+        return means[best] - errors[best] > upper.max()
+
+    def get_memory(self) -> int:
+        """
+        :return: the number of bytes of the node arrays
+        """
+        return sum(array.nbytes for array in
+                   (self.visits, self.wins, self.squares, self.parent, self.first_child,
+                    self.num_children, self.action_index, self.depth))
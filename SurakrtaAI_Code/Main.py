@@ -1,8 +1,9 @@
 from Board import Surakarta
 from Player import HumanPlayer, RandomPlayer, MiniMaxPlayer, MonteCarloPlayer, \
-    Player
+    Player, QUIESCENCE_DEPTH
 from Heuristics import basic_heuristic, position_heuristic, attack_heuristic, \
-    defensive_heuristic, smart_heuristic
+    defensive_heuristic, smart_heuristic, mobility_heuristic, threat_heuristic, \
+    hanging_heuristic
 from GUI import GUI, NotGUI
 
 PLAYERS_HEURISTICS = {
@@ -10,7 +11,10 @@ PLAYERS_HEURISTICS = {
     'H2': defensive_heuristic,
     'H3': position_heuristic,
     'H4': basic_heuristic,
-    'H5': smart_heuristic
+    'H5': smart_heuristic,
+    'H6': mobility_heuristic,
+    'H7': threat_heuristic,
+    'H8': hanging_heuristic
 }
 
 
@@ -19,9 +23,13 @@ def build_MCST_agent() -> MonteCarloPlayer:
     :return: a monte carlo with the user chosen parameters
     """
     depth = int(input('Choose the depth of this agent: '))
-    num_simulations = int(input('Choose the number of simulations: '))
-    heuristic = PLAYERS_HEURISTICS[input('Choose heuristic (H1, H2, H3, H4, H5): ')]
-    return MonteCarloPlayer(depth, num_simulations, heuristic)
+    time_limit = input('Choose the time limit per move in milliseconds '
+                       '(empty to run a number of simulations): ')
+    num_simulations = 0 if time_limit else \
+        int(input('Choose the number of simulations: '))
+    heuristic = PLAYERS_HEURISTICS[input('Choose heuristic (H1 - H8): ')]
+    return MonteCarloPlayer(depth, num_simulations, heuristic,
+                            time_limit=int(time_limit) if time_limit else None)
 
 
 def build_MINIMAX_agent() -> MiniMaxPlayer:
@@ -29,8 +37,13 @@ def build_MINIMAX_agent() -> MiniMaxPlayer:
     :return: a minimax with the user chosen parameters
     """
     depth = int(input('Choose the depth of this agent: '))
-    heuristic = PLAYERS_HEURISTICS[input('Choose heuristic (H1, H2, H3, H4, H5): ')]
-    return MiniMaxPlayer(depth, heuristic)
+    heuristic = PLAYERS_HEURISTICS[input('Choose heuristic (H1 - H8): ')]
+    time_limit = input('Choose the time limit per move in milliseconds '
+                       '(empty to always search to the depth): ')
+    quiescence = input('Follow the captures after the depth? (y/n): ')
+    return MiniMaxPlayer(depth, heuristic,
+                         time_limit=int(time_limit) if time_limit else None,
+                         quiescence_depth=QUIESCENCE_DEPTH if quiescence == 'y' else 0)
 
 
 def get_player(is_gui: bool) -> Player:
@@ -56,12 +69,15 @@ def get_player(is_gui: bool) -> Player:
 if __name__ == '__main__':
     print('There are 4 kinds of players: MCST, MINIMAX, HUMAN and RANDOM.\n'
           'Each agent has its own relevant parameters.')
-    print('There are 5 different heuristics:')
+    print('There are 8 different heuristics:')
     print('    - H1: attack heuristic')
     print('    - H2: defence heuristic')
     print('    - H3: position heuristic')
     print('    - H4: attack-defence heuristic')
     print('    - H5: smart attack-defence-position heuristic')
+    print('    - H6: mobility heuristic')
+    print('    - H7: threat heuristic')
+    print('    - H8: hanging pieces heuristic')
     print()
     is_gui = input('Do you want GUI (y / n)? ') == 'y'
     print('=== Choose the first player (red player) ===')
@@ -0,0 +1,84 @@
+from Enums import Tile
+
+# the number of killer actions kept per ply
+KILLERS_PER_PLY = 2
+
+# the priorities of the action kinds, lower is searched first
+CAPTURE, TABLE, KILLER, QUIET = range(4)
+
+
+class MoveOrderer:
+    """
+    orders the actions of a node for alpha-beta: captures (loop actions)
+    first, then the transposition table (or previous iteration) action, then
+    the killer actions of the ply and then the rest by the history table.
+    the order only depends on the actions, never on the order of the set
+    """
+
+    def __init__(self):
+        self.killers = []
+        self.history = {Tile.RED: {}, Tile.BLACK: {}}
+
+    def new_search(self):
+        """
+        forgets the killers of the last search and ages the history table,
+        so the newer cutoffs weigh more
+        """
+        self.killers = []
+        for history in self.history.values():
+            for point in history:
+                history[point] //= 2
+
+    def _get_killers(self, ply):
+        """
+        :param ply: the distance from the root
+        :return: the killer actions list of the ply
+        """
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        return self.killers[ply]
+
+    def order(self, board, actions, ply, table_action=None) -> list:
+        """
+        :param board: the current board
+        :param actions: the legal actions
+        :param ply: the distance from the root
+        :param table_action: the best action from the transposition table or
+                             from the previous iteration, or None
+        :return: the actions as a list in the order they should be searched
+        """
+        killers = self._get_killers(ply)
+        history = self.history[board.get_color_to_move()]
+
+        def priority(action):
+            points = action.start_point, action.end_point
+            is_table = table_action is not None and action == table_action
+            if board.is_capture_action(action):
+                kind = CAPTURE - is_table
+            elif is_table:
+                kind = TABLE
+            elif action in killers:
+                kind = KILLER
+            else:
+                kind = QUIET
+            return kind, -history.get(points, 0), points
+
+        return sorted(actions, key=priority)
+
+    def record_cutoff(self, board, action, depth, ply):
+        """
+        :param board: the board the cutoff happened in, before the action
+        :param action: the action that caused the cutoff
+        :param depth: the depth left at the node
+        :param ply: the distance from the root
+        updates the killers and the history with the action
+        """
+        if board.is_capture_action(action):
+            return
+        killers = self._get_killers(ply)
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[KILLERS_PER_PLY:]
+        history = self.history[action.color]
+        points = action.start_point, action.end_point
+        history[points] = history.get(points, 0) + depth * depth
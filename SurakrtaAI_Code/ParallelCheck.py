@@ -0,0 +1,54 @@
+import random
+import sys
+from Board import Board
+from Enums import Tile
+from Heuristics import smart_heuristic
+from Player import MiniMaxPlayer
+
+
+def check_parallel_search(depth, plies=30, workers=2, heuristic=smart_heuristic,
+                          seed=0, out=sys.stdout) -> int:
+    """
+    plays a game where red is searched by a serial and by a parallel minimax
+    player, both kept for the whole game so their tables and histories grow
+    apart, and black plays random replies
+    :param depth: the depth of the players
+    :param plies: the number of plies of the game
+    :param workers: the number of worker processes of the parallel player
+    :param heuristic: the heuristic of the players
+    :param seed: the seed of the random replies
+    :param out: the stream to print the mismatches to
+    :return: the number of red moves where the two players chose differently
+    """
+    rng = random.Random(seed)
+    serial = MiniMaxPlayer(depth, heuristic)
+    parallel = MiniMaxPlayer(depth, heuristic, workers=workers)
+    serial.set_color(Tile.RED)
+    parallel.set_color(Tile.RED)
+    board = Board()
+    mismatches = 0
+    try:
+        for _ in range(plies):
+            color = board.get_color_to_move()
+            if color == Tile.RED:
+                action = serial.get_action(board)
+                other = parallel.get_action(board)
+                if action != other:
+                    mismatches += 1
+                    print(f'depth {depth}: serial {action} != parallel {other}', file=out)
+            else:
+                actions = board.get_legal_actions(color)
+                action = rng.choice(sorted(actions, key=lambda a: (a.start_point, a.end_point))) \
+                    if actions else None
+            if action is None:
+                break
+            board.do_action(action)
+    finally:
+        parallel.close()
+    return mismatches
+
+
+if __name__ == '__main__':
+    # usage: python ParallelCheck.py [depth ...]
+    depths = [int(arg) for arg in sys.argv[1:]] or [3, 4]
+    sys.exit(1 if sum(check_parallel_search(depth) for depth in depths) else 0)
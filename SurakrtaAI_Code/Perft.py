@@ -0,0 +1,116 @@
+import sys
+import time
+from Board import Action, Board
+from BitBoard import BitBoard
+
+# name --> the board class of a backend, every backend is checked against the
+# same recorded counts
+BACKENDS = {'board': Board, 'bitboard': BitBoard}
+
+# the test positions: (name, the actions from the starting board as
+# ((y1, x1), (y2, x2)), red moves first, the recorded leaf counts of depths
+# 1, 2, ...). the counts were taken with the original move generator, so a
+# faster generator has to reproduce them exactly
+PERFT_POSITIONS = (
+    ('start', (), (16, 256, 5382, 111122)),
+    ('opening',
+     (((4, 1), (3, 2)), ((1, 3), (2, 4)), ((3, 2), (2, 3)), ((2, 4), (3, 4)),
+      ((5, 1), (4, 1)), ((0, 2), (1, 3)), ((4, 0), (5, 1)), ((1, 4), (2, 5))),
+     (22, 610, 14228, 385323)),
+    ('middlegame',
+     (((4, 5), (3, 5)), ((1, 5), (2, 5)), ((4, 0), (3, 1)), ((2, 5), (2, 4)),
+      ((5, 5), (4, 5)), ((1, 2), (2, 1)), ((4, 5), (5, 5)), ((1, 3), (2, 3)),
+      ((3, 1), (3, 2)), ((2, 1), (3, 1)), ((3, 5), (2, 5)), ((2, 3), (3, 4)),
+      ((3, 2), (2, 3)), ((1, 1), (2, 1)), ((5, 0), (4, 0)), ((1, 0), (1, 1)),
+      ((4, 1), (3, 0)), ((1, 1), (1, 0)), ((4, 4), (4, 5)), ((3, 1), (2, 2))),
+     (29, 996, 29088, 929064)),
+    ('captures',
+     (((4, 2), (3, 3)), ((1, 3), (2, 2)), ((4, 4), (3, 5)), ((1, 4), (2, 4)),
+      ((4, 3), (4, 4)), ((0, 3), (1, 3)), ((4, 4), (4, 3)), ((2, 2), (2, 3)),
+      ((4, 1), (3, 1)), ((1, 2), (0, 3)), ((3, 5), (2, 5)), ((1, 3), (2, 2)),
+      ((4, 0), (4, 1)), ((2, 3), (1, 2)), ((3, 3), (2, 3)), ((2, 2), (3, 3)),
+      ((2, 3), (0, 2)), ((1, 1), (2, 0)), ((3, 1), (2, 2)), ((0, 3), (2, 5)),
+      ((4, 3), (3, 2)), ((3, 3), (3, 4)), ((4, 5), (3, 5)), ((2, 0), (3, 1)),
+      ((3, 2), (4, 3)), ((1, 2), (1, 1)), ((0, 2), (0, 3)), ((1, 5), (1, 4)),
+      ((5, 5), (4, 4)), ((2, 5), (1, 5)), ((0, 3), (1, 2)), ((1, 0), (2, 1)),
+      ((4, 4), (5, 5)), ((1, 4), (2, 3)), ((4, 1), (3, 0)), ((2, 3), (1, 4)),
+      ((5, 3), (4, 2)), ((3, 4), (4, 5)), ((3, 5), (2, 5)), ((3, 1), (2, 0))),
+     (35, 876, 30848, 813767)),
+)
+
+
+def perft(board, depth: int) -> int:
+    """
+    :param board: a board object of any backend
+    :param depth: the number of plies
+    :return: the number of leaves of the tree of the legal actions of the
+             given depth, the side to move is board.get_color_to_move()
+    """
+    actions = board.get_legal_actions(board.get_color_to_move())
+    if depth <= 1:
+        return len(actions) if depth == 1 else 1
+    nodes = 0
+    for action in actions:
+        record = board.do_action(action)
+        nodes += perft(board, depth - 1)
+        board.undo_action(record)
+    return nodes
+
+
+def divide(board, depth: int) -> dict:
+    """
+    :param board: a board object of any backend
+    :param depth: the number of plies, at least 1
+    :return: a dictionary action --> the perft of depth - 1 after it, to find
+             the action whose subtree differs between two backends
+    """
+    counts = {}
+    for action in board.get_legal_actions(board.get_color_to_move()):
+        record = board.do_action(action)
+        counts[action] = perft(board, depth - 1)
+        board.undo_action(record)
+    return counts
+
+
+def get_position(board_class, moves):
+    """
+    :param board_class: the board class of a backend
+    :param moves: the actions from the starting board, as in PERFT_POSITIONS
+    :return: the board of the backend after the actions
+    """
+    board = board_class()
+    for start, end in moves:
+        board.do_action(Action(board.get_color_to_move(), tuple(start), tuple(end)))
+    return board
+
+
+def run_perft(board_class, max_depth=None, out=sys.stdout) -> bool:
+    """
+    runs perft on every test position with a backend and prints the counts,
+    the time and the nodes per second of every depth
+    :param board_class: the board class of a backend
+    :param max_depth: the deepest depth to run, None for every recorded depth
+    :param out: the stream to print to
+    :return: true iff every count is the recorded one
+    """
+    passed = True
+    for name, moves, counts in PERFT_POSITIONS:
+        board = get_position(board_class, moves)
+        for depth, expected in enumerate(counts[:max_depth], 1):
+            start = time.perf_counter()
+            nodes = perft(board, depth)
+            elapsed = time.perf_counter() - start
+            ok = nodes == expected
+            passed &= ok
+            print(f'{board_class.__name__:10} {name:12} depth {depth}: {nodes:10} '
+                  f'{"ok" if ok else f"FAIL, expected {expected}"} '
+                  f'{elapsed:8.3f}s {nodes / max(elapsed, 1e-9):12.0f} nodes/s', file=out)
+    return passed
+
+
+if __name__ == '__main__':
+    # usage: python Perft.py [max depth] [backend ...]
+    depth_arg = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    names = sys.argv[2:] or list(BACKENDS)
+    results = [run_perft(BACKENDS[name], depth_arg) for name in names]
+    sys.exit(0 if all(results) else 1)
@@ -1,10 +1,35 @@
-import numpy as np
 from ast import literal_eval as make_tuple
 from abc import ABC, abstractmethod
 from Board import Action
-from Enums import Tile
-from Heuristics import switch_color
+from Enums import Tile, Bound, Parallelism
+from Heuristics import switch_color, get_batch_heuristic, get_children_boards
+from TranspositionTable import TranspositionTable, TABLE_SIZE
+from MoveOrdering import MoveOrderer
+from SearchStats import SearchStats
+from MCTSTree import MCTSTree, ROOT
+from RolloutEngine import get_rollout_engine
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import random
+import math
+import time
+
+# the number of nodes searched between two checks of the clock
+CLOCK_CHECK_NODES = 256
+# the maximal number of captures the quiescence search follows
+QUIESCENCE_DEPTH = 8
+# the number of Monte Carlo iterations between two confidence checks
+CONFIDENCE_CHECK_ITERATIONS = 64
+# a Monte Carlo search runs at least this many iterations, so the root has a
+# visited child to choose
+MIN_ITERATIONS = 2
+
+
+class SearchTimeout(Exception):
+    """
+    raised inside the search when the time budget of the move runs out
+    """
+    pass
 
 
 class Player(ABC):
@@ -101,178 +126,741 @@ class HumanPlayer(Player):
 
 
 class MiniMaxPlayer(Player):
-    def __init__(self, depth, heuristic):
+    def __init__(self, depth, heuristic, table_size=TABLE_SIZE, time_limit=None,
+                 quiescence_depth=0, workers=0, batch_frontier=False):
         """
-        :param depth: the depth of the tree
+        :param depth: the depth of the tree, the maximal depth if time_limit
+                      is given
         :param heuristic: the heuristic for evaluation
+        :param table_size: the number of entries in the transposition table,
+                           0 to search without one
+        :param time_limit: the time budget of a move in milliseconds, None to
+                           always search to depth
+        :param quiescence_depth: the maximal number of captures searched after
+                                 depth, 0 to evaluate the leaves as they are
+        :param workers: the number of processes that split the root actions of
+                        a fixed depth search, 0 to search in this process
+        :param batch_frontier: score the children of the nodes one ply above
+                               the leaves together with the batch counterpart
+                               of the heuristic, if it has one. the built in
+                               heuristics are read in O(1) from the board, so
+                               this pays off for costlier ones
         """
         super().__init__()
         self.depth = depth
         self.heuristic = heuristic
+        # scores all the children of a frontier node in one call, if any
+        self.batch_frontier = batch_frontier
+        self.batch_heuristic = get_batch_heuristic(heuristic) if batch_frontier else None
+        self.table_size = table_size
+        self.table = TranspositionTable(table_size) if table_size else None
+        self.orderer = MoveOrderer()
+        self.time_limit = time_limit
+        self.quiescence_depth = quiescence_depth
+        self.deadline = None
+        # the number of nodes at which check_clock next reads the clock
+        self.next_clock_check = 0
+        self.stats = SearchStats()
+        self.pv = []
+        self.principal_variation = []
+        self.workers = workers
+        self.pool = None
+
+    def __getstate__(self):
+        """
+        :return: the state to pickle, without the process pool
+        """
+        state = self.__dict__.copy()
+        state['pool'] = None
+        return state
+
+    def close(self):
+        """
+        shuts down the worker processes of the parallel search, if any
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def set_color(self, color: Tile):
+        """
+        :param color: the color wanted
+        sets the color of the player, the stored scores are relative to the
+        color so they are forgotten when it changes
+        """
+        if color != self.color:
+            if self.table is not None:
+                self.table.clear()
+            self.orderer = MoveOrderer()
+        super().set_color(color)
 
     def get_action(self, board) -> Action:
         """
         :param board: gets a board object
         :return: the chosen action by the player for the given board
         """
-        action, score = self.minimax_alpha_beta(board, self.depth, self.color)
-        return action
+        if self.table is not None:
+            self.table.new_search()
+        self.orderer.new_search()
+        self.stats = SearchStats()
+        try:
+            if self.time_limit is not None:
+                return self.iterative_deepening(board.__copy__())
+            search = self.parallel_search if self.workers else self.search
+            action, score, self.principal_variation = search(board.__copy__(),
+                                                             self.depth)
+            self.stats.end_iteration(self.depth)
+            return action
+        finally:
+            self.stats.end_search()
 
-    def minimax_alpha_beta(self, game_state, depth, color, is_max=True,
-                           alpha=-float('inf'), beta=float('inf')):
+    def parallel_search(self, game_state, depth):
         """
         :param game_state: the current game state
-        :param depth: the depth left
-        :param color: the current color of the player
-        :param is_max: boolean if the player is the max player or not
-        :param alpha: the alpha parameter
-        :param beta: the beta parameter
-        :return: a tuple of (Action, score) for the best action for the player
+        :param depth: the depth to search to
+        :return: a tuple (Action, score, principal variation) like search.
+                 every root action is searched with the full window by a
+                 worker process, and among the actions with the best exact
+                 score the one with the smallest get_tie_key is chosen. the
+                 serial search breaks its root ties the same way, so both
+                 choose the same action whatever their root order is
+        """
+        actions = game_state.get_legal_actions(self.color)
+        if len(actions) == 0:
+            return None, self.evaluate(game_state, self.color), []
+        actions = self.orderer.order(game_state, actions, 0)
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        settings = (self.heuristic, self.color, self.table_size,
+                    self.quiescence_depth, self.batch_heuristic is not None)
+        futures = [self.pool.submit(search_root_action, game_state, action,
+                                    depth, settings) for action in actions]
+        best = None
+        for action, future in zip(actions, futures):
+            score, pv, nodes = future.result()
+            self.stats.nodes += nodes
+            if best is None or score > best[1] or \
+                    (score == best[1] and get_tie_key(action) < get_tie_key(best[0])):
+                best = action, score, pv
+        return best
+
+    def iterative_deepening(self, game_state) -> Action:
         """
-        actions = game_state.get_legal_actions(color)
-        if depth == 0 or len(actions) == 0:
-            return None, self.heuristic(game_state, self.color)
-        if is_max:
-            max_action = None
-            for action in actions:
-                state = game_state.__copy__()
-                state.do_action(action)
-                last_action, score = self.minimax_alpha_beta(state, depth - 1,
-                                                             switch_color(color),
-                                                             False, alpha, beta)
-                if alpha < score:
-                    max_action, alpha = action, score
-                if alpha >= beta:
-                    return None, alpha
-            return max_action, alpha
-        else:
-            min_action = None
-            for action in actions:
-                state = game_state.__copy__()
-                state.do_action(action)
-                last_action, score = self.minimax_alpha_beta(state, depth - 1,
-                                                             switch_color(color),
-                                                             True, alpha, beta)
-                if beta > score:
-                    min_action, beta = action, score
-                if alpha >= beta:
-                    return None, beta
-            return min_action, beta
-
-
-class Node:
-    total_simulations = 0
-
-    def __init__(self, state, color, prev=None, action=None):
-        """
-        :param state: the current state of the game
-        :param color: the color of the node
-        :param prev: a pointer to the previous node or None
-        :param action: the action that created this Node or None
-        """
-        self.state = state
-        self.color = color
-        self.next = set()
-        self.prev = prev
-        self.action = action
-        self.visit_num = 0
-        self.win = 0
+        :param game_state: the current game state
+        :return: the best action of the deepest search that ended in time.
+                 searches depth 1, 2, ... up to self.depth until time_limit
+                 passes, the first search always ends so there is an action
+        """
+        best_action, self.deadline, self.next_clock_check = None, None, 0
+        for depth in range(1, self.depth + 1):
+            try:
+                action, score, pv = self.search(game_state, depth, best_action)
+            except SearchTimeout:
+                # game_state is left in the middle of the search, stop here
+                break
+            best_action, self.principal_variation = action, pv
+            self.stats.end_iteration(depth)
+            self.deadline = self.stats.start + self.time_limit / 1000
+            if time.perf_counter() >= self.deadline:
+                break
+        self.deadline = None
+        return best_action
+
+    def search(self, game_state, depth, first_action=None):
+        """
+        :param game_state: the current game state, the actions are done and
+                           undone on it in place
+        :param depth: the depth to search to
+        :param first_action: an action to search first if the transposition
+                             table has none
+        :return: a tuple (Action, score, principal variation) of the best
+                 action of the player, its score and the list of actions both
+                 players are expected to play from the position
+        """
+        self.pv = []
+        score = self.negamax(game_state, depth, self.color, -float('inf'),
+                             float('inf'), 0, first_action)
+        pv = self.pv[0]
+        return (pv[0] if pv else None), score, pv
 
-    def expand(self, add_actions=False):
+    def evaluate(self, game_state, color):
         """
-        :param add_actions: boolean if should remember the actions to create the nodes
-        creates all the children of the node
+        :param game_state: the current game state
+        :param color: the color to move
+        :return: the heuristic of the player, from the side of color
         """
-        actions = self.state.get_legal_actions(self.color)
-        for action in actions:
-            next_state = self.state.__copy__()
-            next_state.do_action(action)
-            self.next.add(Node(next_state, switch_color(self.color),
-                               self, action if add_actions else None))
+        score = self.heuristic(game_state, self.color)
+        return score if color == self.color else -score
 
-    def get_uct(self):
+    def check_clock(self):
         """
-        :return: get the value of the node
+        raises SearchTimeout if the time budget of the move ran out, the clock
+        is only read once CLOCK_CHECK_NODES nodes were searched since the last
+        read, the frontier counts several nodes at once so it can pass over
+        a multiple of CLOCK_CHECK_NODES
         """
-        return (self.win / self.visit_num + (2 * np.log(Node.total_simulations) / self.visit_num) ** 0.5) \
-            if self.visit_num else float('inf')
+        if self.deadline is not None and self.stats.nodes >= self.next_clock_check:
+            self.next_clock_check = self.stats.nodes + CLOCK_CHECK_NODES
+            if time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
 
-    @staticmethod
-    def best_child_uct(node):
+    def probe_table(self, game_state, depth, alpha, beta):
+        """
+        :param game_state: the current game state
+        :param depth: the depth left
+        :param alpha: the alpha parameter
+        :param beta: the beta parameter
+        :return: a tuple (stored, action) where stored is the (Action, score)
+                 stored for the position if it can be used as is, else None,
+                 and action is the best action stored for it, if any. only
+                 results of the same depth are used as is, so the score never
+                 depends on what was searched before
+        """
+        if self.table is None:
+            return None, None
+        entry = self.table.probe(game_state.get_key())
+        if entry is None:
+            return None, None
+        if entry.depth == depth and (
+                entry.bound == Bound.EXACT or
+                (entry.bound == Bound.LOWER and entry.score >= beta) or
+                (entry.bound == Bound.UPPER and entry.score <= alpha)):
+            return (entry.action, entry.score), entry.action
+        return None, entry.action
+
+    def negamax(self, game_state, depth, color, alpha, beta, ply=0,
+                first_action=None):
+        """
+        :param game_state: the current game state, the actions are done and
+                           undone on it in place
+        :param depth: the depth left
+        :param color: the color to move
+        :param alpha: the alpha parameter, from the side of color
+        :param beta: the beta parameter, from the side of color
+        :param ply: the distance from the root
+        :param first_action: an action to search first if the transposition
+                             table has none
+        :return: the score of the position from the side of color, clamped
+                 to [alpha, beta]. the first action is searched with the full
+                 window and the rest with a null window, which is searched
+                 again only if the action turns out to be better. at the root
+                 an action with a smaller get_tie_key than the best one so far
+                 also wins a tie, so its null window is just below alpha. the
+                 chosen action then does not depend on the root order
+        """
+        self.stats.nodes += 1
+        self.check_clock()
+        while len(self.pv) <= ply + 1:
+            self.pv.append([])
+        self.pv[ply] = []
+        if depth == 0:
+            if self.quiescence_depth:
+                return self.quiescence(game_state, self.quiescence_depth, color,
+                                       alpha, beta)
+            return min(max(self.evaluate(game_state, color), alpha), beta)
+        stored, table_action = self.probe_table(game_state, depth, alpha, beta)
+        if stored is not None:
+            action, score = stored
+            self.pv[ply] = [action] if action is not None else []
+            return min(max(score, alpha), beta)
+        actions = game_state.get_legal_actions(color)
+        if len(actions) == 0:
+            return min(max(self.evaluate(game_state, color), alpha), beta)
+        actions = self.orderer.order(game_state, actions, ply,
+                                     table_action or first_action)
+        if depth == 1 and not self.quiescence_depth and \
+                self.batch_heuristic is not None:
+            return self.search_frontier(game_state, actions, color, alpha, beta, ply)
+        next_color = switch_color(color)
+        best_action = None
+        for index, action in enumerate(actions):
+            record = game_state.do_action(action)
+            if index == 0:
+                score = -self.negamax(game_state, depth - 1, next_color,
+                                      -beta, -alpha, ply + 1)
+            else:
+                low = get_null_alpha(alpha, ply, action, best_action)
+                high = math.nextafter(low, float('inf'))
+                score = -self.negamax(game_state, depth - 1, next_color,
+                                      -high, -low, ply + 1)
+                if low < score < beta:
+                    self.stats.researches += 1
+                    score = -self.negamax(game_state, depth - 1, next_color,
+                                          -beta, -low, ply + 1)
+            game_state.undo_action(record)
+            if score > alpha or (index and score == alpha and low < alpha):
+                alpha, best_action = score, action
+                self.pv[ply] = [action] + self.pv[ply + 1]
+            if alpha >= beta:
+                self.stats.record_cutoff(index)
+                self.orderer.record_cutoff(game_state, action, depth, ply)
+                self.store_table(game_state, depth, Bound.LOWER, beta, action)
+                return beta
+        self.store_table(game_state, depth, Bound.EXACT if best_action is not None
+                         else Bound.UPPER, alpha, best_action)
+        return alpha
+
+    def search_frontier(self, game_state, actions, color, alpha, beta, ply):
+        """
+        :param game_state: the current game state, one ply above the leaves
+        :param actions: the ordered legal actions of color
+        :param color: the color to move
+        :param alpha: the alpha parameter, from the side of color
+        :param beta: the beta parameter, from the side of color
+        :param ply: the distance from the root
+        :return: the score negamax gives the position at depth 1, with the
+                 children scored together by the batch heuristic. the nodes
+                 and researches are counted as if the leaves were searched
+        """
+        scores = self.batch_heuristic(get_children_boards(game_state, actions),
+                                      self.color)
+        if color != self.color:
+            scores = -scores
+        best_action = None
+        for index, (action, score) in enumerate(zip(actions, scores.tolist())):
+            self.stats.nodes += 1
+            low = get_null_alpha(alpha, ply, action, best_action)
+            if index and low < score < beta:
+                self.stats.nodes += 1
+                self.stats.researches += 1
+            if score > alpha or (index and score == alpha and low < alpha):
+                alpha, best_action = score, action
+                self.pv[ply] = [action]
+            if alpha >= beta:
+                self.stats.record_cutoff(index)
+                self.orderer.record_cutoff(game_state, action, 1, ply)
+                self.store_table(game_state, 1, Bound.LOWER, beta, action)
+                return beta
+        self.store_table(game_state, 1, Bound.EXACT if best_action is not None
+                         else Bound.UPPER, alpha, best_action)
+        return alpha
+
+    def quiescence(self, game_state, depth, color, alpha, beta):
+        """
+        :param game_state: the current game state, the captures are done and
+                           undone on it in place
+        :param depth: the number of captures left to follow
+        :param color: the color to move
+        :param alpha: the alpha parameter, from the side of color
+        :param beta: the beta parameter, from the side of color
+        :return: the score of the position from the side of color once no
+                 capture is worth doing, clamped to [alpha, beta]. the player
+                 may always stop capturing (stand pat), so the heuristic
+                 bounds the score before any capture is searched
+        """
+        self.stats.nodes += 1
+        self.stats.quiescence_nodes += 1
+        self.check_clock()
+        stand_pat = self.evaluate(game_state, color)
+        if stand_pat >= beta:
+            return beta
+        alpha = max(alpha, stand_pat)
+        if depth == 0:
+            return alpha
+        captures = sorted(game_state.get_capture_actions(color),
+                          key=lambda a: (a.start_point, a.end_point))
+        next_color = switch_color(color)
+        for action in captures:
+            record = game_state.do_action(action)
+            score = -self.quiescence(game_state, depth - 1, next_color,
+                                     -beta, -alpha)
+            game_state.undo_action(record)
+            if score >= beta:
+                return beta
+            alpha = max(alpha, score)
+        return alpha
+
+    def store_table(self, game_state, depth, bound, score, action):
         """
-        :param node: the node
-        :return: the best child of the node (unexplored is always better)
+        :param game_state: the current game state
+        :param depth: the depth left
+        :param bound: if score is exact, a lower bound or an upper bound
+        :param score: the score of the search
+        :param action: the best action found or None
+        stores the result of the search in the transposition table
         """
-        return max(node.next, key=lambda n: n.get_uct())
+        if self.table is not None:
+            self.table.store(game_state.get_key(), depth, bound, score, action)
+
+
+def get_tie_key(action):
+    """
+    :param action: a root action
+    :return: the key that breaks the ties between the root actions of the same
+             score, the smaller key is chosen
+    """
+    return action.start_point, action.end_point
+
+
+def get_null_alpha(alpha, ply, action, best_action):
+    """
+    :param alpha: the alpha parameter of the node
+    :param ply: the distance of the node from the root
+    :param action: the action about to be searched with a null window
+    :param best_action: the best action of the node so far, or None
+    :return: the lower end of the null window of the action. at the root an
+             action with a smaller get_tie_key than the best one also wins a
+             tie, so its window is just below alpha
+    """
+    if not ply and best_action is not None and \
+            get_tie_key(action) < get_tie_key(best_action):
+        return math.nextafter(alpha, -float('inf'))
+    return alpha
+
+
+# the players of a worker process, by their settings
+_WORKER_PLAYERS = {}
+
+
+def search_root_action(game_state, action, depth, settings):
+    """
+    runs in a worker process of MiniMaxPlayer.parallel_search, the worker
+    keeps its own player (and transposition table) for every settings
+    :param game_state: the board of the root, a copy owned by the worker
+    :param action: the root action to search
+    :param depth: the depth of the search from the root
+    :param settings: a tuple (heuristic, color, table_size, quiescence_depth,
+                     batch_frontier) of the searching player
+    :return: a tuple (score, principal variation, nodes) of the exact score
+             of the action for the player
+    """
+    if settings not in _WORKER_PLAYERS:
+        heuristic, color, table_size, quiescence_depth, batch_frontier = settings
+        player = MiniMaxPlayer(depth, heuristic, table_size,
+                               quiescence_depth=quiescence_depth,
+                               batch_frontier=batch_frontier)
+        player.set_color(color)
+        _WORKER_PLAYERS[settings] = player
+    player = _WORKER_PLAYERS[settings]
+    player.stats, player.pv = SearchStats(), []
+    game_state.do_action(action)
+    score = -player.negamax(game_state, depth - 1,
+                            switch_color(action.get_color()),
+                            -float('inf'), float('inf'), 1)
+    return score, [action] + player.pv[1], player.stats.nodes
 
 
 class MonteCarloPlayer(Player):
-    def __init__(self, depth, num, heuristic):
+    def __init__(self, depth, num, heuristic, workers=0,
+                 parallelism=Parallelism.ROOT, leaf_batch=None, seed=None,
+                 widening=None, reuse_tree=True, time_limit=None,
+                 confidence=None, rollout_batch=None):
         """
         :param depth: the depth of the rollout each time
         :param num: the number of iteration
         :param heuristic: the heuristic for evaluation
+        :param workers: the number of worker processes, 0 to search in this
+                        process
+        :param parallelism: ROOT to grow a tree in every worker and merge their
+                            roots, LEAF to run a batch of rollouts per leaf
+                            in the workers
+        :param leaf_batch: the number of rollouts per leaf in LEAF mode, split
+                           between the workers (default one per worker)
+        :param seed: the seed of the rollouts, None to use the global random
+        :param widening: None to try every action of a node, or a tuple
+                         (constant, exponent) of progressive widening, a node
+                         with n visits gets ceil(constant * n ** exponent)
+                         children at most
+        :param reuse_tree: keep the tree between moves and continue from the
+                           node of the position after the opponent's move
+        :param time_limit: the time budget of a move in milliseconds, num is
+                           ignored if given
+        :param confidence: None to always use the whole budget, or a number of
+                           standard errors, the search stops early once the
+                           best root child is ahead by that confidence
+        :param rollout_batch: None to play one rollout per leaf, or the number
+                              of rollouts per leaf played together by the
+                              vectorized rollout engine
         """
         super().__init__()
         self.depth = depth
         self.num = num
         self.heuristic = heuristic
+        self.workers = workers
+        self.parallelism = parallelism
+        self.leaf_batch = leaf_batch
+        self.seed = seed
+        self.widening = widening
+        self.reuse_tree = reuse_tree
+        self.time_limit = time_limit
+        self.confidence = confidence
+        self.rollout_batch = rollout_batch
+        # the tree of the running search, or the kept tree between moves
+        self.tree = None
+        self.rng = random if seed is None else random.Random(seed)
+        self.moves = 0
+        # the reused list of the packed legal moves of a rollout step
+        self.move_buffer = []
+        self.pool = None
+
+    def __getstate__(self):
+        """
+        :return: the state to pickle, without the process pool
+        """
+        state = self.__dict__.copy()
+        state['pool'] = None
+        if state['rng'] is random:
+            state['rng'] = None
+        return state
+
+    def __setstate__(self, state):
+        """
+        :param state: the pickled state
+        restores the player, with the global random if it had no seed
+        """
+        self.__dict__.update(state)
+        if self.rng is None:
+            self.rng = random
+
+    def close(self):
+        """
+        shuts down the worker processes, if any
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def set_color(self, color: Tile):
+        """
+        :param color: the color wanted
+        sets the color of the player and drops the kept tree
+        """
+        super().set_color(color)
+        self.tree = None
+
+    def get_settings(self):
+        """
+        :return: a tuple (depth, heuristic, color, widening, time_limit,
+                 confidence, rollout_batch) that rebuilds the player in a
+                 worker process
+        """
+        return self.depth, self.heuristic, self.color, self.widening, \
+            self.time_limit, self.confidence, self.rollout_batch
+
+    def get_seed(self, *indices):
+        """
+        :param indices: the indices of a task in the current move
+        :return: a seed for the task, the same for the same player seed, move
+                 and indices, or None if the player has no seed
+        """
+        if self.seed is None:
+            return None
+        return hash((self.seed, self.moves) + indices)
 
     def get_action(self, board) -> Action:
         """
         :param board: gets a board object
         :return: the chosen action by the player for the given board
         """
-        root = Node(board, self.color)
-        for i in range(self.num):
-            leaf = self.traverse(root)
-            leaf.expand(leaf == root)
-            result = self.rollout(leaf)
-            self.backpropagate(leaf, result)
-            Node.total_simulations += 1
-        best = max(root.next, key=lambda n: n.win / n.visit_num if n.visit_num else -float('inf'))
-        return best.action
+        self.moves += 1
+        if self.workers and self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        if self.workers and self.parallelism == Parallelism.ROOT:
+            return self.root_parallel_action(board)
+        action = self.search(board, self.num, self.find_subtree(board)).get_best_action()
+        if not self.reuse_tree:
+            self.tree = None
+        return action
+
+    def get_best_action(self):
+        """
+        :return: the best action of the running search so far (or of the last
+                 one if the tree is kept), None if there is no tree
+        """
+        return None if self.tree is None else self.tree.get_best_action()
+
+    def find_subtree(self, board):
+        """
+        :param board: gets a board object
+        :return: the kept tree rerooted at the node of the board, two plies
+                 below its root, or None if the board is not in the tree
+        """
+        if self.tree is None:
+            return None
+        tree, self.tree = self.tree, None
+        node = tree.find(board)
+        return None if node is None else tree.reroot(node)
+
+    def search(self, board, num, tree=None):
+        """
+        :param board: gets a board object
+        :param num: the number of iterations, ignored if time_limit is set
+        :param tree: a tree of the board to continue growing, None for a new one
+        :return: the tree grown from the board
+        """
+        deadline = None if self.time_limit is None else \
+            time.perf_counter() + self.time_limit / 1000
+        if tree is None:
+            tree = MCTSTree(board.__copy__(), self.color, self.widening)
+        self.tree = tree
+        i = 0
+        while i < MIN_ITERATIONS or \
+                (i < num if deadline is None else time.perf_counter() < deadline):
+            leaf = self.traverse(tree)
+            records = tree.replay(leaf)
+            child = tree.expand(leaf) if tree.visits[leaf] else None
+            if child is not None:
+                records.append(tree.board.do_action(tree.get_action(child)))
+                leaf = child
+            if self.workers and self.parallelism == Parallelism.LEAF:
+                results = self.leaf_parallel_rollouts(tree, leaf, i)
+            elif self.rollout_batch:
+                results = self.batch_rollouts(tree.board, tree.get_color(leaf),
+                                              self.rollout_batch)
+            else:
+                results = [self.rollout(tree.board, tree.get_color(leaf))]
+            tree.undo_replay(records)
+            self.backpropagate(tree, leaf, sum(results), len(results),
+                               sum(result ** 2 for result in results))
+            i += 1
+            if self.confidence is not None and i % CONFIDENCE_CHECK_ITERATIONS == 0 \
+                    and tree.is_decided(self.confidence):
+                break
+        return tree
+
+    def root_parallel_action(self, board) -> Action:
+        """
+        :param board: gets a board object
+        :return: the best action of the merged roots. every worker grows its
+                 own tree with num // workers iterations and its own seed, and
+                 the visits and wins of the root children are summed by action
+        """
+        num = max(1, self.num // self.workers)
+        futures = [self.pool.submit(grow_tree, self.get_settings(), board, num,
+                                    self.get_seed(worker))
+                   for worker in range(self.workers)]
+        merged = {}
+        for future in futures:
+            for action, visits, wins in future.result():
+                old_visits, old_wins = merged.get(action, (0, 0))
+                merged[action] = old_visits + visits, old_wins + wins
+        return max(merged, key=lambda a: merged[a][1] / merged[a][0]
+                   if merged[a][0] else -float('inf'))
+
+    def leaf_parallel_rollouts(self, tree, leaf, iteration):
+        """
+        :param tree: the tree, its board replayed to the leaf
+        :param leaf: the node to simulate through
+        :param iteration: the index of the iteration in the search
+        :return: the results of leaf_batch rollouts from the leaf, split
+                 between the workers
+        """
+        leaf_batch = self.leaf_batch or self.workers
+        counts = [leaf_batch // self.workers + (worker < leaf_batch % self.workers)
+                  for worker in range(self.workers)]
+        futures = [self.pool.submit(run_rollouts, self.get_settings(), tree.board,
+                                    tree.get_color(leaf), count,
+                                    self.get_seed(iteration, worker))
+                   for worker, count in enumerate(counts) if count]
+        return [result for future in futures for result in future.result()]
 
     @staticmethod
-    def traverse(node):
+    def traverse(tree):
         """
-        :param node: gets the root
-        :return: an unexplored child of the root that has the most potential
+        :param tree: gets the tree
+        :return: the node of the tree that has the most potential and is
+                 unexplored or can expand
         """
-        while node.next and node.get_uct() != float('inf'):
-            node = Node.best_child_uct(node)
+        node = ROOT
+        while tree.num_children[node] and tree.visits[node] and not tree.can_expand(node):
+            node = tree.best_child_uct(node)
         return node
 
-    def rollout(self, node):
+    def rollout(self, state, color):
         """
-        :param node: the node to simulate through
-        simulates a run from node for depth steps
+        :param state: the board to simulate through, restored afterwards
+        :param color: the color to move in the board
+        simulates a run from the board for depth steps
         """
-        state = node.state.__copy__()
-        cur_color = node.color
+        cur_color = color
+        records = []
         for _ in range(self.depth):
-            actions = state.get_legal_actions(cur_color)
-            if len(actions) == 0:
-                return self.heuristic(state, self.color)
-            state.do_action(random.choice(tuple(actions)))
+            moves = state.get_legal_moves(cur_color, self.move_buffer)
+            if len(moves) == 0:
+                break
+            records.append(state.do_action(
+                Action.from_move(cur_color, self.rng.choice(moves), state.width)))
             cur_color = switch_color(cur_color)
-        return self.heuristic(state, self.color)
+        result = self.heuristic(state, self.color)
+        for record in reversed(records):
+            state.undo_action(record)
+        return result
+
+    def batch_rollouts(self, state, color, count):
+        """
+        :param state: the board to simulate through, left unchanged
+        :param color: the color to move in the board
+        :param count: the number of rollouts
+        :return: the results of count rollouts of depth steps from the board,
+                 played together by the rollout engine
+        """
+        engine = get_rollout_engine(state.height, state.width)
+        rng = np.random.default_rng(self.rng.getrandbits(64))
+        boards = engine.rollouts(state, color, count, self.depth, rng)
+        batch_heuristic = get_batch_heuristic(self.heuristic)
+        if batch_heuristic is not None:
+            return batch_heuristic(boards.reshape(count, state.height, state.width),
+                                   self.color).tolist()
+        return [self.heuristic(engine.decode(row), self.color) for row in boards]
 
-    def backpropagate(self, node, result):
+    def backpropagate(self, tree, node, result, visits=1, square=None):
         """
+        :param tree: the tree of the node
         :param node: the current node
         :param result: the result by the simulation
-        updates the node with the result and calls to update the previous one
+        :param visits: the number of simulations the result sums
+        :param square: the sum of the squared results, result ** 2 if None
+        updates the node and all its ancestors with the result
         """
-        if node:
-            node.visit_num += 1
-            node.win += result
-            self.backpropagate(node.prev, result)
+        tree.update(node, result, visits, square)
+
+
+def build_worker_player(settings, seed) -> MonteCarloPlayer:
+    """
+    :param settings: the settings of the player from get_settings
+    :param seed: the seed of the rollouts of the worker
+    :return: a serial copy of the player in a worker process
+    """
+    depth, heuristic, color, widening, time_limit, confidence, rollout_batch = settings
+    player = MonteCarloPlayer(depth, 0, heuristic, seed=seed, widening=widening,
+                              time_limit=time_limit, confidence=confidence,
+                              rollout_batch=rollout_batch)
+    player.set_color(color)
+    return player
+
+
+def grow_tree(settings, board, num, seed):
+    """
+    runs in a worker process of the root parallel search
+    :param settings: the settings of the player from get_settings
+    :param board: the board of the root
+    :param num: the number of iterations
+    :param seed: the seed of the rollouts of the worker
+    :return: a list of (action, visits, wins) of the root children
+    """
+    return build_worker_player(settings, seed).search(board, num).get_root_statistics()
+
+
+def run_rollouts(settings, state, color, count, seed):
+    """
+    runs in a worker process of the leaf parallel search
+    :param settings: the settings of the player from get_settings
+    :param state: the board of the leaf
+    :param color: the color to move in the leaf
+    :param count: the number of rollouts
+    :param seed: the seed of the rollouts
+    :return: the results of the rollouts from the leaf
+    """
+    player = build_worker_player(settings, seed)
+    if player.rollout_batch:
+        return player.batch_rollouts(state, color, count)
+    return [player.rollout(state, color) for _ in range(count)]
 
 
 class RandomPlayer(Player):
     def __init__(self, seed=42):
         super().__init__()
+        self.seed = seed
         random.seed(seed)
 
     def get_action(self, board) -> Action:
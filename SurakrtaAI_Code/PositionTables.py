@@ -0,0 +1,55 @@
+import numpy as np
+from functools import lru_cache
+
+position_array = np.array([[0, 5, 5, 5, 5, 0],
+                           [5, 10, 20, 20, 10, 5],
+                           [5, 20, 10, 10, 20, 5],
+                           [5, 20, 10, 10, 20, 5],
+                           [5, 10, 20, 20, 10, 5],
+                           [0, 5, 5, 5, 5, 0]])
+
+position_array_2 = np.array([[0, 5, 5, 5, 5, 0],
+                             [5, 20, 10, 10, 20, 5],
+                             [5, 10, 20, 20, 10, 5],
+                             [5, 10, 20, 20, 10, 5],
+                             [5, 20, 10, 10, 20, 5],
+                             [0, 5, 5, 5, 5, 0]])
+
+# the tables the boards keep a running score of, by index
+POSITION_TABLES = (position_array, position_array_2)
+
+
+@lru_cache(maxsize=None)
+def get_position_tables(height, width) -> tuple:
+    """
+    :param height: the height of the board
+    :param width: the width of the board
+    :return: a tuple of the position tables, each a tuple of the values of
+             the squares y * width + x, built once per size. a board of
+             another size than the tables gets zero tables
+    """
+    return tuple(tuple(table.flatten().tolist()) if table.shape == (height, width)
+                 else (0,) * (height * width) for table in POSITION_TABLES)
+
+
+@lru_cache(maxsize=None)
+def get_position_arrays(height, width) -> tuple:
+    """
+    :param height: the height of the board
+    :param width: the width of the board
+    :return: a tuple of the position tables as (height, width) arrays, zero
+             for a board of another size than the tables
+    """
+    return tuple(np.array(table).reshape(height, width)
+                 for table in get_position_tables(height, width))
+
+
+def compute_position_scores(board, color) -> list:
+    """
+    :param board: a board object of any backend
+    :param color: the color of the pieces
+    :return: a list of the scores of the color's pieces, one per table
+    """
+    tables = get_position_tables(board.height, board.width)
+    squares = [y * board.width + x for y, x in board.get_pieces_positions(color)]
+    return [sum(table[square] for square in squares) for table in tables]
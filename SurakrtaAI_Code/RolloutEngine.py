@@ -0,0 +1,162 @@
+import numpy as np
+from functools import lru_cache
+from Enums import Tile
+from Board import Board
+from Circuits import get_circuits
+
+# the value of the padding square of the rays, it blocks like a piece of no
+# color so a ray never captures past its end
+WALL = Tile.HINT.value
+# int value --> tile, to turn a row of the tensor back into a board
+TILES = np.array([Tile.EMPTY, Tile.BLACK, Tile.RED], dtype=object)
+
+
+class RolloutEngine:
+    """
+    plays many random games at once. the boards are the rows of an integer
+    tensor of shape (n, height * width) holding the tile values, square
+    y * width + x. every move of a board is a slot: a king move from the
+    tables or the capture found along one ray of the circuits
+    """
+
+    def __init__(self, height, width):
+        """
+        :param height: the height of the board
+        :param width: the width of the board
+        """
+        self.height, self.width = height, width
+        self.size = height * width
+        king_starts, king_ends = [], []
+        for y in range(height):
+            for x in range(width):
+                for j in range(-1, 2):
+                    for i in range(-1, 2):
+                        if (i or j) and 0 <= y + j < height and 0 <= x + i < width:
+                            king_starts.append(y * width + x)
+                            king_ends.append((y + j) * width + x + i)
+        self.king_starts = np.array(king_starts)
+        self.king_ends = np.array(king_ends)
+        circuits = get_circuits(height, width)
+        rays = [(y * width + x, ray) for (y, x), point_rays in
+                sorted(circuits.rays.items()) for ray in point_rays]
+        length = max(len(ray) for _, ray in rays) + 1
+        # the rays padded with the square self.size, which is always a wall
+        self.ray_starts = np.array([start for start, _ in rays])
+        self.ray_squares = np.full((len(rays), length), self.size)
+        self.ray_loops = np.zeros((len(rays), length), dtype=np.int64)
+        for index, (start, ray) in enumerate(rays):
+            for step, (_, square, loops) in enumerate(ray):
+                self.ray_squares[index, step] = square
+                self.ray_loops[index, step] = loops
+        # a moving piece leaves its square, so it never blocks its own ray
+        self.ray_origin = self.ray_squares == self.ray_starts[:, None]
+        # pairs of rays of the same square, the later one repeats a capture
+        # the earlier one already found
+        pairs = [(first, second) for first in range(len(rays))
+                 for second in range(first + 1, len(rays))
+                 if rays[first][0] == rays[second][0]]
+        self.duplicates = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        self.starts = np.concatenate((self.king_starts, self.ray_starts))
+
+    def encode(self, board) -> np.ndarray:
+        """
+        :param board: a board object of any backend
+        :return: the row of the tensor of the board
+        """
+        row = np.zeros(self.size, dtype=np.int8)
+        for color in (Tile.RED, Tile.BLACK):
+            for y, x in board.get_pieces_positions(color):
+                row[y * self.width + x] = color.value
+        return row
+
+    def get_moves(self, boards, color: Tile):
+        """
+        :param boards: the tensor of the boards
+        :param color: the color to move in all the boards
+        :return: a tuple (legal, ends) of arrays of shape (n, slots). legal
+                 marks the distinct legal moves, ends holds the end squares,
+                 the start squares are self.starts
+        """
+        n = len(boards)
+        own, enemy = color.value, 3 - color.value
+        padded = np.concatenate((boards, np.full((n, 1), WALL, boards.dtype)), axis=1)
+        king = (boards[:, self.king_starts] == own) & \
+            (boards[:, self.king_ends] == Tile.EMPTY.value)
+        tiles = padded[:, self.ray_squares]
+        blocking = (tiles != Tile.EMPTY.value) & ~self.ray_origin
+        first = np.argmax(blocking, axis=2)
+        rays = np.arange(len(self.ray_starts))
+        hit = np.take_along_axis(tiles, first[:, :, None], axis=2)[:, :, 0]
+        captures = (boards[:, self.ray_starts] == own) & (hit == enemy) & \
+            (self.ray_loops[rays, first] > 0)
+        capture_ends = self.ray_squares[rays, first]
+        if len(self.duplicates):
+            earlier, later = self.duplicates[:, 0], self.duplicates[:, 1]
+            repeated = captures[:, earlier] & captures[:, later] & \
+                (capture_ends[:, earlier] == capture_ends[:, later])
+            for index in np.unique(later):
+                captures[:, index] &= ~repeated[:, later == index].any(axis=1)
+        legal = np.concatenate((king, captures), axis=1)
+        ends = np.concatenate((np.broadcast_to(self.king_ends, king.shape),
+                               capture_ends), axis=1)
+        return legal, ends
+
+    def play(self, boards, color: Tile, depth, rng):
+        """
+        plays up to depth random moves in all the boards, in place. a board
+        stops once the player to move has no legal move
+        :param boards: the tensor of the boards
+        :param color: the color to move in all the boards
+        :param depth: the number of moves
+        :param rng: a numpy random generator
+        :return: the boards
+        """
+        active = np.ones(len(boards), dtype=bool)
+        for _ in range(depth):
+            legal, ends = self.get_moves(boards, color)
+            active &= legal.any(axis=1)
+            if not active.any():
+                break
+            # the maximal random number among the legal slots is a uniform
+            # choice of a legal move
+            choices = np.argmax(np.where(legal, rng.random(legal.shape), -1), axis=1)
+            rows = np.flatnonzero(active)
+            choices = choices[rows]
+            boards[rows, ends[rows, choices]] = color.value
+            boards[rows, self.starts[choices]] = Tile.EMPTY.value
+            color = Tile.BLACK if color == Tile.RED else Tile.RED
+        return boards
+
+    def rollouts(self, board, color: Tile, count, depth, rng):
+        """
+        :param board: a board object of any backend
+        :param color: the color to move in the board
+        :param count: the number of games
+        :param depth: the number of moves of every game
+        :param rng: a numpy random generator
+        :return: the tensor of the count boards reached from the board
+        """
+        boards = np.tile(self.encode(board), (count, 1))
+        return self.play(boards, color, depth, rng)
+
+    def decode(self, row) -> Board:
+        """
+        :param row: a row of the tensor
+        :return: a board of the row, for the heuristics without a batch form.
+                 the row does not keep the no-capture counters or the color
+                 to move, so they are 0 and red
+        """
+        board = Board(self.height, self.width)
+        board.set_tiles(TILES[row].reshape(self.height, self.width))
+        return board
+
+
+@lru_cache(maxsize=None)
+def get_rollout_engine(height, width) -> RolloutEngine:
+    """
+    :param height: the height of the board
+    :param width: the width of the board
+    :return: the rollout engine of a board of the given size, built once per
+             size
+    """
+    return RolloutEngine(height, width)
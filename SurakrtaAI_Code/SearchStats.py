@@ -0,0 +1,99 @@
+import time
+
+
+class SearchStats:
+    """
+    the counters of one search of MiniMaxPlayer
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.cutoffs = 0
+        self.researches = 0
+        self.depth = 0
+        self.iteration_nodes = []
+        self.iteration_times = []
+        # cutoff_indices[i] is the number of cutoffs found by the i+1 action
+        self.cutoff_indices = []
+        self.start = time.perf_counter()
+        self.elapsed = 0.
+
+    def end_iteration(self, depth):
+        """
+        :param depth: the depth of the iteration that ended
+        records the nodes searched and the time until the end of the iteration
+        """
+        self.depth = depth
+        self.iteration_nodes.append(self.nodes)
+        self.elapsed = time.perf_counter() - self.start
+        self.iteration_times.append(self.elapsed)
+
+    def end_search(self):
+        """
+        records the time until the end of the search. the nodes of an
+        iteration cut by the time limit are counted, so its time is counted too
+        """
+        self.elapsed = time.perf_counter() - self.start
+
+    def record_cutoff(self, index):
+        """
+        :param index: the number of actions searched before the action that
+                      caused the cutoff
+        """
+        self.cutoffs += 1
+        while len(self.cutoff_indices) <= index:
+            self.cutoff_indices.append(0)
+        self.cutoff_indices[index] += 1
+
+    def get_first_cutoff_rate(self) -> float:
+        """
+        :return: the fraction of the cutoffs found by the first action
+        """
+        return self.cutoff_indices[0] / self.cutoffs if self.cutoffs else 0.
+
+    def get_mean_searched_before_cutoff(self) -> float:
+        """
+        :return: the mean number of actions searched before a cutoff
+        """
+        return sum(i * n for i, n in enumerate(self.cutoff_indices)) / self.cutoffs \
+            if self.cutoffs else 0.
+
+    def get_branching_factor(self) -> float:
+        """
+        :return: the effective branching factor, the growth of the nodes from
+                 the previous iteration or the depth-th root of the nodes when
+                 there was only one iteration
+        """
+        if len(self.iteration_nodes) > 1 and self.iteration_nodes[-2]:
+            return self.iteration_nodes[-1] / self.iteration_nodes[-2]
+        if not self.depth:
+            return 0.
+        return self.nodes ** (1 / self.depth)
+
+    def get_nodes_per_second(self) -> float:
+        """
+        :return: the number of nodes searched per second over the whole
+                 search
+        """
+        return self.nodes / self.elapsed if self.elapsed else 0.
+
+    def as_dict(self) -> dict:
+        """
+        :return: the statistics as a dictionary
+        """
+        return {'depth': self.depth,
+                'nodes': self.nodes,
+                'quiescence nodes': self.quiescence_nodes,
+                'cutoffs': self.cutoffs,
+                'first cutoffs': self.get_first_cutoff_rate(),
+                'searched before cutoff': self.get_mean_searched_before_cutoff(),
+                'researches': self.researches,
+                'branching factor': self.get_branching_factor(),
+                'nodes/sec': self.get_nodes_per_second(),
+                'time': self.elapsed}
+
+    def __repr__(self):
+        return ', '.join(f'{name}: {value:.4g}' if isinstance(value, float)
+                         else f'{name}: {value}'
+                         for name, value in self.as_dict().items())
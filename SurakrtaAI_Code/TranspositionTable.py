@@ -0,0 +1,85 @@
+from Enums import Bound
+
+TABLE_SIZE = 2 ** 16
+
+
+class Entry:
+    __slots__ = ('key', 'depth', 'bound', 'score', 'action', 'generation')
+
+    def __init__(self, key, depth, bound, score, action, generation):
+        """
+        :param key: the zobrist key of the position
+        :param depth: the depth the position was searched to
+        :param bound: if score is exact, a lower bound or an upper bound
+        :param score: the score of the search
+        :param action: the best action found or None
+        :param generation: the search that stored the entry
+        """
+        self.key = key
+        self.depth = depth
+        self.bound = bound
+        self.score = score
+        self.action = action
+        self.generation = generation
+
+
+class TranspositionTable:
+    """
+    a fixed size table of search results indexed by the zobrist key. an entry
+    is replaced by an entry of the same position, by any entry once it is left
+    from an older search, or else only by an entry searched at least as deep
+    """
+
+    def __init__(self, size=TABLE_SIZE):
+        """
+        :param size: the number of entries in the table
+        """
+        self.size = size
+        self.entries = [None] * size
+        self.generation = 0
+
+    def new_search(self):
+        """
+        marks the entries stored until now as old, so new ones replace them
+        """
+        self.generation += 1
+
+    def clear(self):
+        """
+        removes all the entries
+        """
+        self.entries = [None] * self.size
+
+    def probe(self, key) -> Entry:
+        """
+        :param key: the zobrist key of the position
+        :return: the entry of the position or None
+        """
+        entry = self.entries[key % self.size]
+        if entry is not None and entry.key == key:
+            return entry
+        return None
+
+    def store(self, key, depth, bound: Bound, score, action):
+        """
+        :param key: the zobrist key of the position
+        :param depth: the depth the position was searched to
+        :param bound: if score is exact, a lower bound or an upper bound
+        :param score: the score of the search
+        :param action: the best action found or None
+        stores the result if the replacement policy allows it
+        """
+        index = key % self.size
+        entry = self.entries[index]
+        if entry is None or entry.key == key or \
+                entry.generation != self.generation or depth >= entry.depth:
+            if action is None and entry is not None and entry.key == key:
+                action = entry.action
+            self.entries[index] = Entry(key, depth, bound, score, action,
+                                        self.generation)
+
+    def get_usage(self) -> float:
+        """
+        :return: the fraction of the table in use
+        """
+        return sum(entry is not None for entry in self.entries) / self.size
@@ -0,0 +1,89 @@
+import random
+from functools import lru_cache
+from Enums import Tile
+
+# the no-capture counters are hashed up to this value, the game ends once
+# both of them reach it so larger values play the same
+MAX_COUNTER = 40
+SEED = 2021
+
+
+class ZobristKeys:
+    """
+    random 64 bit keys for every part of a position, the key of a position is
+    the xor of the keys of its parts
+    """
+
+    def __init__(self, height, width, seed=SEED):
+        """
+        :param height: the height of the board
+        :param width: the width of the board
+        :param seed: the seed of the keys, the same seed gives the same keys
+        """
+        rng = random.Random(seed)
+        self.height, self.width = height, width
+        self.red = tuple(rng.getrandbits(64) for _ in range(height * width))
+        self.black = tuple(rng.getrandbits(64) for _ in range(height * width))
+        self.black_to_move = rng.getrandbits(64)
+        self.last_eat_red = tuple(rng.getrandbits(64)
+                                  for _ in range(MAX_COUNTER + 1))
+        self.last_eat_black = tuple(rng.getrandbits(64)
+                                    for _ in range(MAX_COUNTER + 1))
+
+    def get_piece_keys(self, color: Tile) -> tuple:
+        """
+        :param color: the color of the pieces
+        :return: the keys of the squares y * width + x for the given color
+        """
+        return self.red if color == Tile.RED else self.black
+
+    def get_action_key(self, color: Tile, start: int, end: int,
+                       eaten: Tile) -> int:
+        """
+        :param color: the color of the moving piece
+        :param start: the square y * width + x the piece moves from
+        :param end: the square y * width + x the piece moves to
+        :param eaten: the tile that was in end before the move
+        :return: the xor of the keys of the pieces changed by the move
+        """
+        keys = self.get_piece_keys(color)
+        key = keys[start] ^ keys[end]
+        if eaten == Tile.RED:
+            key ^= self.red[end]
+        elif eaten == Tile.BLACK:
+            key ^= self.black[end]
+        return key
+
+    def get_counters_key(self, last_eat_red: int, last_eat_black: int) -> int:
+        """
+        :param last_eat_red: the number of moves since the red ate
+        :param last_eat_black: the number of moves since the black ate
+        :return: the key of the no-capture counters
+        """
+        return self.last_eat_red[min(last_eat_red, MAX_COUNTER)] ^ \
+            self.last_eat_black[min(last_eat_black, MAX_COUNTER)]
+
+    def compute_key(self, board) -> int:
+        """
+        :param board: a board object of any backend
+        :return: the key of the board computed from scratch
+        """
+        key = 0
+        for color in (Tile.RED, Tile.BLACK):
+            keys = self.get_piece_keys(color)
+            for y, x in board.get_pieces_positions(color):
+                key ^= keys[y * self.width + x]
+        if board.get_color_to_move() == Tile.BLACK:
+            key ^= self.black_to_move
+        return key ^ self.get_counters_key(board.get_last_eating_move_red(),
+                                           board.get_last_eating_move_black())
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(height, width) -> ZobristKeys:
+    """
+    :param height: the height of the board
+    :param width: the width of the board
+    :return: the keys of a board of the given size, built once per size
+    """
+    return ZobristKeys(height, width)